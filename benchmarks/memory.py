@@ -0,0 +1,48 @@
+"""Compare memory used by regular and slotted model instances.
+
+Usage: python benchmarks/memory.py [ROWS]
+"""
+
+import datetime as dt
+import sys
+import tracemalloc
+
+from pypika_orm import Model, fields
+
+
+class User(Model):
+    id = fields.Auto()
+    name = fields.Varchar()
+    email = fields.Varchar()
+    created = fields.Datetime()
+    is_active = fields.Bool()
+    role_id = fields.Integer()
+
+
+class SlottedUser(User):
+
+    class Meta:
+        slots = True
+
+
+def measure(model, rows):
+    names = model.meta.field_names
+    tracemalloc.start()
+    instances = [model._from_row(row, names) for row in rows]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, instances
+
+
+def main(count=100_000):
+    now = dt.datetime.utcnow()
+    rows = [(idx, f"user{idx}", f"user{idx}@example.com", now, True, 1) for idx in range(count)]
+
+    for model in (User, SlottedUser):
+        size, _ = measure(model, rows)
+        print(f"{model.__name__:<12} {count} rows: {size / 2 ** 20:7.2f} MiB, "
+              f"{size / count:6.1f} B/row")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,273 @@
+"""Benchmark the query building and hydration hot paths.
+
+Cases run offline: queries are compiled without a database, hydration reads records from a
+fake driver and bulk inserts go to in-memory SQLite. Results (best time of the repeats) are
+written to JSON and can be compared with the results of another commit.
+
+Usage: python benchmarks/suite.py [-o results.json] [--compare base.json] [--quick] [GROUP ...]
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from aio_databases.record import Record
+
+from pypika_orm import Manager, Model, fields
+
+
+class Role(Model):
+    id = fields.Auto()
+    name = fields.Varchar(max_length=100, default='user')
+    created = fields.Datetime(default=dt.datetime.utcnow)
+
+
+class User(Model):
+    id = fields.Auto()
+    name = fields.Varchar()
+    email = fields.Varchar()
+    created = fields.Datetime(default=dt.datetime.utcnow)
+    is_active = fields.Bool(default=True, null=False)
+    role_id = fields.ForeignKey(Role.id)
+
+
+def make_model(width, name='Wide'):
+    """Create a model with the given number of fields."""
+    attrs = {'id': fields.Auto()}
+    for idx in range(1, width):
+        attrs[f"field{idx}"] = fields.Integer() if idx % 2 else fields.Varchar()
+    return type(name, (Model,), attrs)
+
+
+class FakeDatabase:
+    """Database stub which returns prepared records (measures the ORM overhead only)."""
+
+    def __init__(self, records=()):
+        self.records = list(records)
+
+    async def fetchall(self, sql, *params):
+        return self.records
+
+    async def fetchone(self, sql, *params):
+        return self.records[0] if self.records else None
+
+    async def execute(self, sql, *params):
+        return None
+
+
+def make_records(model, rows):
+    meta = model.meta
+    description = [(name,) for name in meta.field_names]
+    now = dt.datetime.utcnow()
+    values = [
+        now if isinstance(field, fields.Datetime) else
+        True if isinstance(field, fields.Bool) else
+        idx if isinstance(field, (fields.Integer, fields.ForeignKey)) else f"value{idx}"
+        for idx, field in enumerate(meta.fields.values())
+    ]
+    return [Record((pk, *values[1:]), description) for pk in range(rows)]
+
+
+def measure(fn, number, repeat):
+    """Get the best time of a call (seconds)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+async def ameasure(fn, number, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+# Compile
+# -------
+
+def compile_cases(manager):
+    yield 'compile.select_pk', lambda: manager(User).select().where(User.id == 1)
+    yield 'compile.select_filter', lambda: (
+        manager(User).select().where(User.is_active & (User.name.like('j%')))
+        .orderby(User.created).limit(20).offset(40))
+    yield 'compile.select_join', lambda: (
+        manager(User).select(User, Role).join(Role).on(User.role_id == Role.id)
+        .where(Role.name == 'admin'))
+    yield 'compile.select_in_100', lambda: (
+        manager(User).select().where(User.id.isin(list(range(100)))))
+    yield 'compile.insert', lambda: manager(User).insert(
+        name='jim', email='jim@example.com', is_active=True, role_id=1)
+    yield 'compile.update', lambda: manager(User).update().set(User.name, 'jim').where(
+        User.id == 1)
+
+
+def bench_compile(args):
+    results = {}
+    number = 200 if args.quick else 2000
+    for cache_size, suffix in ((0, ''), (256, '.cached')):
+        manager = Manager(dialect='postgresql', cache_size=cache_size)
+        for name, build in compile_cases(manager):
+            query = build()
+            results[f"{name}{suffix}"] = {
+                'time': measure(query.compile, number, args.repeat), 'number': number}
+
+            # Build the query and compile it
+            if not suffix:
+                results[f"{name}.build"] = {
+                    'time': measure(lambda: build().compile(), number, args.repeat),
+                    'number': number}
+
+    return results
+
+
+# Hydration
+# ---------
+
+async def bench_hydrate(args):
+    results = {}
+    sizes = (1_000,) if args.quick else (1_000, 100_000)
+    models = [('users', User)] + [(f"wide{width}", make_model(width)) for width in (3, 10, 30)]
+    for rows in sizes:
+        repeat = args.repeat if rows < 100_000 else 1
+        for label, model in models:
+            manager = Manager(dialect='postgresql')
+            manager.db = FakeDatabase(make_records(model, rows))
+            query = manager(model).select()
+            for mode in (None, 'tuples', 'dicts'):
+                qs = query.fetch_as(mode, ()) if mode else query
+                elapsed = await ameasure(qs.fetchall, 1, repeat)
+                results[f"hydrate.{label}.{mode or 'models'}.{rows}"] = {
+                    'time': elapsed, 'rows': rows, 'rows_per_sec': rows / elapsed}
+
+    return results
+
+
+# Bulk insert
+# -----------
+
+async def bench_insert(args):
+    results = {}
+    rows = 1_000 if args.quick else 10_000
+    values = [
+        {'name': f"user{idx}", 'email': f"user{idx}@example.com", 'is_active': True,
+         'role_id': 1}
+        for idx in range(rows)
+    ]
+    async with Manager('sqlite:///:memory:') as manager:
+        await manager(Role).create_table().if_not_exists()
+        await manager(User).create_table().if_not_exists()
+
+        for name, run in (
+                ('insert_many', lambda: manager(User).insert_many(values)),
+                ('insert_one', lambda: insert_one(manager, values[:rows // 10]))):
+            size = rows if name == 'insert_many' else rows // 10
+            best = float('inf')
+            for _ in range(args.repeat):
+                async with manager.transaction() as trans:
+                    start = time.perf_counter()
+                    await run()
+                    best = min(best, time.perf_counter() - start)
+                    await trans.rollback()
+            results[f"insert.{name}.{size}"] = {
+                'time': best, 'rows': size, 'rows_per_sec': size / best}
+
+    return results
+
+
+async def insert_one(manager, values):
+    for value in values:
+        await manager(User).insert(**value)
+
+
+# Models
+# ------
+
+def bench_models(args):
+    results = {}
+    number = 20 if args.quick else 200
+    for width in (3, 10, 30):
+        results[f"model.class.{width}"] = {
+            'time': measure(lambda: make_model(width), number, args.repeat), 'number': number}
+
+    results['model.subclass'] = {
+        'time': measure(lambda: type('Admin', (User,), {'role': fields.Varchar()}), number,
+                        args.repeat),
+        'number': number}
+
+    number *= 50
+    values = {'name': 'jim', 'email': 'jim@example.com', 'role_id': 1}
+    results['model.init'] = {
+        'time': measure(lambda: User(**values), number, args.repeat), 'number': number}
+    return results
+
+
+# Runner
+# ------
+
+GROUPS = {
+    'compile': bench_compile, 'hydrate': bench_hydrate, 'insert': bench_insert,
+    'models': bench_models,
+}
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, base):
+    print(f"\n{'case':<40} {'base':>12} {'current':>12} {'ratio':>8}")
+    for name, res in results.items():
+        if name in base:
+            before, after = base[name]['time'], res['time']
+            print(f"{name:<40} {before * 1e6:10.2f}us {after * 1e6:10.2f}us "
+                  f"{after / before:7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-o', '--output', help='write the results to the JSON file')
+    parser.add_argument('--compare', help='compare the results with the given JSON file')
+    parser.add_argument('--quick', action='store_true', help='run smaller cases')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('groups', nargs='*', choices=[[], *GROUPS], help='groups to run')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for group in args.groups or GROUPS:
+        res = GROUPS[group](args)
+        results.update(asyncio.run(res) if asyncio.iscoroutine(res) else res)
+
+    for name, res in results.items():
+        print(f"{name:<40} {res['time'] * 1e6:12.2f}us")
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({
+                'commit': get_commit(), 'python': platform.python_version(),
+                'date': dt.datetime.utcnow().isoformat(), 'quick': args.quick,
+                'results': results,
+            }, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as base:
+            compare(results, json.load(base)['results'])
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,360 @@
+"""Backend specific helpers which are not covered by aio-databases."""
+
+from __future__ import annotations
+
+import asyncio
+import typing as t
+from asyncio import TimeoutError, ensure_future, gather
+from collections import deque
+from contextvars import Context, copy_context
+from time import perf_counter
+
+from aio_databases import Database
+from aio_databases.backends import ABCConnection
+from aio_databases.record import Record
+
+
+# Pool options names per backend: pool size, min size, connections recycle time, prepared
+# statements cache size per connection
+POOL_OPTIONS = {
+    'asyncpg': (
+        'max_size', 'min_size', 'max_inactive_connection_lifetime', 'statement_cache_size'),
+    'aiomysql': ('maxsize', 'minsize', 'pool_recycle'),
+}
+
+TBatches = t.AsyncGenerator[t.List[t.Mapping], None]
+TIterator = t.Callable[[ABCConnection, str, t.Tuple, int], TBatches]
+
+ITERATORS: t.Dict[str, TIterator] = {}
+
+# Backends which cursors block their connections until all the results are read
+BLOCKING_CURSORS = {'aiomysql'}
+
+TAsyncGen = t.TypeVar('TAsyncGen', bound=t.AsyncGenerator)
+
+
+class aclosing(t.Generic[TAsyncGen]):
+    """Close an async generator on exit (`contextlib.aclosing` is available since Python 3.10).
+
+    A generator which is left early (break, exception) keeps its cursor and transaction open
+    until it is garbage collected, the context manager closes them deterministically:
+
+        async with aclosing(qs.iterate()) as models:
+            async for model in models:
+                ...
+    """
+
+    def __init__(self, agen: TAsyncGen):
+        self.agen = agen
+
+    async def __aenter__(self) -> TAsyncGen:
+        return self.agen
+
+    async def __aexit__(self, *exc_info):
+        await self.agen.aclose()
+
+
+async def iterate(
+        db: Database, sql: str, params: t.Tuple, size: int) -> TBatches:
+    """Fetch records by batches with a server-side cursor when the backend supports it.
+
+    The connection is locked only while a batch is being fetched, so other queries may be run
+    between batches. MySQL does not allow it while an unbuffered cursor is open, so the
+    records are streamed with a dedicated pooled connection there (inside a transaction they
+    are fetched at once, as the other connections don't see the transaction's changes).
+
+    The cursor (and the implicit transaction for Postgres) is released when the iteration is
+    finished or the generator is closed, wrap it with `aclosing` to stop the iteration early.
+    """
+    name = db.backend.name
+    iterator = ITERATORS.get(name)
+    dedicated = name in BLOCKING_CURSORS
+    if iterator is None or (dedicated and in_transaction(db)):
+        records = await db.fetchall(sql, *params)
+        for start in range(0, len(records), size):
+            yield records[start:start + size]
+        return
+
+    connection = db.backend.connection() if dedicated else db.connection
+    await connection.acquire()
+    db.logger.debug((sql, *params))
+    try:
+        async with aclosing(iterator(connection, sql, params, size)) as batches:
+            async for records in batches:
+                yield records
+
+    finally:
+        if dedicated:
+            await connection.release()
+
+
+async def _iterate_asyncpg(
+        connection: ABCConnection, sql: str, params: t.Tuple, size: int
+) -> TBatches:
+    conn = connection.conn
+    trans = None
+    async with connection._lock:
+        # Postgres cursors live inside a transaction only
+        if not conn.is_in_transaction():
+            trans = conn.transaction()
+            await trans.start()
+        cursor = await conn.cursor(sql, *params)
+
+    try:
+        while True:
+            async with connection._lock:
+                records = await cursor.fetch(size)
+
+            if records:
+                yield records
+
+            if len(records) < size:
+                break
+
+    finally:
+        if trans is not None:
+            async with connection._lock:
+                await trans.commit()
+
+
+ITERATORS['asyncpg'] = _iterate_asyncpg
+
+
+async def _iterate_aiomysql(
+        connection: ABCConnection, sql: str, params: t.Tuple, size: int
+) -> TBatches:
+    from aiomysql import SSCursor
+
+    async with connection._lock:
+        cursor = await connection.conn.cursor(SSCursor)
+        await cursor.execute(sql, params)
+
+    try:
+        description = cursor.description
+        while True:
+            async with connection._lock:
+                rows = await cursor.fetchmany(size)
+
+            if rows:
+                yield [Record(row, description) for row in rows]
+
+            if len(rows) < size:
+                break
+
+    finally:
+        async with connection._lock:
+            await cursor.close()
+
+
+ITERATORS['aiomysql'] = _iterate_aiomysql
+
+
+async def _iterate_aiosqlite(
+        connection: ABCConnection, sql: str, params: t.Tuple, size: int
+) -> TBatches:
+    async with connection._lock:
+        cursor = await connection.conn.execute(sql, params)
+
+    try:
+        description = cursor.description
+        while True:
+            async with connection._lock:
+                rows = await cursor.fetchmany(size)
+
+            if rows:
+                yield [Record(row, description) for row in rows]
+
+            if len(rows) < size:
+                break
+
+    finally:
+        await cursor.close()
+
+
+ITERATORS['aiosqlite'] = _iterate_aiosqlite
+
+
+def supports_copy(db: Database) -> bool:
+    """Check the database is able to load records with COPY."""
+    return db.backend.name == 'asyncpg'
+
+
+async def copy_records(
+        db: Database, table: str, columns: t.Sequence[str], records: t.Sequence[t.Tuple]) -> t.Any:
+    """Load the records into the table with COPY (asyncpg)."""
+    connection = await db.connection.acquire()
+    async with connection._lock:
+        db.logger.debug(('COPY', table, columns, len(records)))
+        return await connection.conn.copy_records_to_table(
+            table, records=records, columns=columns)
+
+
+def get_pool_size(db: Database) -> t.Optional[int]:
+    """Get the max size of the database's connections pool (None when it is not pooled)."""
+    pool = getattr(db.backend, 'pool', None)
+    if pool is None:
+        return None
+
+    if hasattr(pool, 'get_max_size'):  # asyncpg
+        return pool.get_max_size()
+
+    return getattr(pool, 'maxsize', None)  # aiomysql
+
+
+def is_asyncio() -> bool:
+    """Check the code is run by an asyncio event loop (not trio)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+async def wait_for(aw: t.Awaitable, timeout: float) -> t.Any:
+    """Wait for the awaitable with a timeout under asyncio or trio (raises TimeoutError)."""
+    if is_asyncio():
+        return await asyncio.wait_for(aw, timeout)
+
+    import trio
+
+    with trio.move_on_after(timeout) as scope:
+        return await aw
+
+    if scope.cancelled_caught:
+        raise TimeoutError
+
+
+def in_transaction(db: Database) -> bool:
+    """Check the current connection of the database has an active transaction."""
+    return bool(db.connection.transactions)
+
+
+def supports_concurrency(db: Database) -> bool:
+    """Check queries may be run concurrently on separate pooled connections.
+
+    Queries inside a transaction have to use the transaction's connection. The pooled drivers
+    (asyncpg, aiomysql) work with asyncio only.
+    """
+    return get_pool_size(db) is not None and is_asyncio() and not in_transaction(db)
+
+
+async def run_concurrently(
+        dbs: t.Sequence[Database], coros: t.Sequence[t.Awaitable]) -> t.List[t.Any]:
+    """Run the coroutines in asyncio tasks with their own pooled connections.
+
+    The tasks are run in copies of the current context without the database connections,
+    so each of them acquires connections of the given databases (a primary and replicas) and
+    releases them when it's done. The rest of the tasks are cancelled when one fails.
+    """
+    context = Context()
+    for var, value in copy_context().items():
+        if not isinstance(value, ABCConnection):
+            context.run(var.set, value)
+
+    async def run(coro: t.Awaitable) -> t.Any:
+        try:
+            return await coro
+        finally:
+            for db in dbs:
+                await db.connection.release()
+
+    tasks = [context.run(ensure_future, run(coro)) for coro in coros]
+    try:
+        return await gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
+        raise
+
+
+def get_pool_options(
+        db: Database, size: t.Optional[int] = None, min_size: t.Optional[int] = None,
+        recycle: t.Optional[float] = None, statements: t.Optional[int] = None
+) -> t.Dict[str, t.Any]:
+    """Get the backend's options for the given pool settings (not pooled backends ignore them).
+
+    Only asyncpg caches prepared statements (it drops them on the connections release).
+    """
+    names = POOL_OPTIONS.get(db.backend.name)
+    if names is None:
+        return {}
+
+    return {name: value for name, value in zip(names, (size, min_size, recycle, statements))
+            if value is not None}
+
+
+class PoolMonitor:
+    """Measure connections acquisition for the database's backend.
+
+    The backend's acquire/release methods are wrapped to count used connections, record
+    acquisition wait times and apply an acquisition timeout (aio-databases has no hooks for
+    that). The timeout works with asyncio and trio. Use `get_monitor` to wrap a backend once.
+    """
+
+    def __init__(self, db: Database, timeout: t.Optional[float] = None, history: int = 1000):
+        self.db = db
+        self.timeout = timeout
+        self.acquired = self.released = self.timeouts = 0
+        self.waits: t.Deque[float] = deque(maxlen=history)
+
+        backend = db.backend
+        self._acquire, self._release = backend.acquire, backend.release
+        backend.acquire, backend.release = self.acquire, self.release  # type: ignore
+
+    async def acquire(self) -> t.Any:
+        start = perf_counter()
+        try:
+            if self.timeout is None:
+                conn = await self._acquire()
+            else:
+                conn = await wait_for(self._acquire(), self.timeout)
+
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+
+        self.waits.append(perf_counter() - start)
+        self.acquired += 1
+        return conn
+
+    async def release(self, conn: t.Any):
+        self.released += 1
+        return await self._release(conn)
+
+    def stats(self) -> t.Dict[str, t.Any]:
+        """Get the pool's state and percentiles of acquisition wait time (seconds)."""
+        in_use = self.acquired - self.released
+        pool = getattr(self.db.backend, 'pool', None)
+        idle = None
+        if pool is not None:
+            idle = pool.get_idle_size() if hasattr(pool, 'get_idle_size') else pool.freesize
+
+        waits = sorted(self.waits)
+        return {
+            'size': get_pool_size(self.db), 'in_use': in_use, 'idle': idle,
+            'acquired': self.acquired, 'timeouts': self.timeouts,
+            'wait_p50': percentile(waits, 50), 'wait_p95': percentile(waits, 95),
+            'wait_p99': percentile(waits, 99),
+        }
+
+
+def get_monitor(db: Database, timeout: t.Optional[float] = None) -> PoolMonitor:
+    """Get the monitor of the database's backend, install it when there is no one.
+
+    The timeout is applied to a new monitor only, an installed one keeps its own.
+    """
+    monitor = getattr(db.backend.acquire, '__self__', None)
+    if isinstance(monitor, PoolMonitor):
+        return monitor
+
+    return PoolMonitor(db, timeout=timeout)
+
+
+def percentile(values: t.Sequence[float], q: float) -> t.Optional[float]:
+    """Get a percentile of the sorted values (nearest rank)."""
+    if not values:
+        return None
+
+    idx = max(0, min(len(values) - 1, int(round(q / 100 * len(values))) - 1))
+    return values[idx]
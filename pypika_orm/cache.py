@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import typing as t
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from enum import Enum
+from time import monotonic
+
+from pypika.queries import Field, Table
+
+from .fields import Value
+
+
+if t.TYPE_CHECKING:
+    from .query import ModelDBMixin
+
+
+SHAPE_IGNORE = {'_db', '_cache', '_results', '_router', '_hooks', '_model_values'}
+SHAPE_SCALARS = {bool, int, float}
+SHAPE_CONTAINERS = {list, tuple, set, dict}
+
+
+class QueryCache:
+    """LRU cache of compiled SQL templates keyed by a query shape.
+
+    A shape is a structure of a query (model, terms, joins, conditions and etc) where bind
+    parameters are replaced by markers, so queries which differ only by parameters values
+    share the same compiled SQL.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.hits = self.misses = self.evictions = 0
+        self._templates: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def __repr__(self) -> str:
+        return f"<QueryCache {self.stats()}>"
+
+    def compile(self, query: ModelDBMixin) -> t.Tuple[str, t.Tuple]:
+        """Get SQL and parameters for the given query."""
+        terms: t.List[Value] = []
+        try:
+            key = type(query), get_shape(query, terms)
+            template = self._templates.get(key)
+        except TypeError:
+            sql, params = query.render()
+            return sql, params.values
+
+        if template is None:
+            self.misses += 1
+            sql, params = query.render()
+            positions = {id(term): idx for idx, term in enumerate(terms)}
+            try:
+                order = tuple(positions[id(term)] for term in params)
+            except KeyError:
+                return sql, params.values
+
+            self._templates[key] = sql, order
+            if len(self._templates) > self.size:
+                self._templates.popitem(last=False)
+                self.evictions += 1
+
+            return sql, params.values
+
+        self.hits += 1
+        self._templates.move_to_end(key)
+        sql, order = template
+        return sql, tuple(terms[idx].value for idx in order)
+
+    def clear(self):
+        """Drop the cached templates."""
+        self._templates.clear()
+
+    def stats(self) -> t.Dict[str, int]:
+        return {
+            'size': self.size, 'length': len(self._templates),
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+        }
+
+
+class ResultCache(ABC):
+    """An interface of query results caches.
+
+    Results are stored by keys (compiled SQL with parameters) and tagged with the names of
+    the tables they were read from, so writes to a table invalidate them. An external store
+    (Redis and etc) may implement the interface.
+    """
+
+    @abstractmethod
+    async def get(self, key: str, default: t.Any = None) -> t.Any:
+        """Get a stored value or the default one."""
+
+    @abstractmethod
+    async def set(self, key: str, value: t.Any, ttl: t.Optional[float] = None,
+                  tables: t.Iterable[str] = ()):
+        """Store the value for the given time (seconds) or until the tables are changed."""
+
+    @abstractmethod
+    async def invalidate(self, tables: t.Iterable[str]):
+        """Drop the values which have been read from the given tables."""
+
+
+class MemoryResultCache(ResultCache):
+    """In-process LRU cache of query results."""
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self._values: OrderedDict = OrderedDict()
+        self._tables: t.Dict[str, t.Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"<MemoryResultCache size={self.size} length={len(self._values)}>"
+
+    async def get(self, key: str, default: t.Any = None) -> t.Any:
+        item = self._values.get(key)
+        if item is None:
+            return default
+
+        expires, value, _ = item
+        if expires is not None and expires < monotonic():
+            self._discard(key)
+            return default
+
+        self._values.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: t.Any, ttl: t.Optional[float] = None,
+                  tables: t.Iterable[str] = ()):
+        tables = tuple(tables)
+        self._discard(key)
+        self._values[key] = (None if ttl is None else monotonic() + ttl), value, tables
+        for table in tables:
+            self._tables.setdefault(table, set()).add(key)
+
+        if len(self._values) > self.size:
+            self._discard(next(iter(self._values)))
+
+    async def invalidate(self, tables: t.Iterable[str]):
+        for table in tables:
+            for key in self._tables.pop(table, ()):
+                self._discard(key)
+
+    def clear(self):
+        self._values.clear()
+        self._tables.clear()
+
+    def _discard(self, key: str):
+        item = self._values.pop(key, None)
+        if item is None:
+            return
+
+        for table in item[2]:
+            keys = self._tables.get(table)
+            if keys:
+                keys.discard(key)
+
+
+def get_shape(obj: t.Any, terms: t.List[Value]) -> t.Any:
+    """Get a hashable structure of the given object and collect its bind parameters terms.
+
+    Raise TypeError when the object cannot be represented.
+    """
+    cls = type(obj)
+    if cls is str or obj is None:
+        return obj
+
+    if cls in SHAPE_SCALARS or isinstance(obj, Enum):
+        return cls, obj
+
+    if cls is list or cls is tuple:
+        return (list, *[get_shape(item, terms) for item in obj])
+
+    if isinstance(obj, Value):
+        terms.append(obj)
+        return Value, obj.alias
+
+    # Fast paths for the most common terms
+    if isinstance(obj, Field):
+        return Field, obj.name, obj.alias, get_shape(obj.table, terms)
+
+    if cls is Table and obj._schema is None and obj._for is None and obj._for_portion is None:
+        return Table, obj._table_name, obj.alias
+
+    if isinstance(obj, (set, frozenset)):
+        return set, frozenset(get_shape(item, terms) for item in obj)
+
+    if isinstance(obj, dict):
+        return (dict, *[(key, get_shape(val, terms)) for key, val in obj.items()])
+
+    if isinstance(obj, type) or callable(obj):
+        hash(obj)
+        return obj
+
+    if not hasattr(obj, '__dict__'):
+        hash(obj)
+        return cls, obj
+
+    return (cls, *[
+        (name, get_shape(val, terms)) for name, val in obj.__dict__.items()
+        if not (val is None or val is False or name in SHAPE_IGNORE or (
+            type(val) in SHAPE_CONTAINERS and not val))])
@@ -0,0 +1,58 @@
+"""Collect query results by columns into typed arrays."""
+
+from __future__ import annotations
+
+import typing as t
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# array.array typecodes for the fields' python types (other types are kept in lists)
+TYPECODES: t.Dict[t.Any, str] = {int: 'q', float: 'd'}
+NUMPY_TYPES = {'q': 'int64', 'd': 'float64'}
+
+
+class Columns:
+    """Accumulate records batches column by column.
+
+    Numbers are stored in typed arrays, a column falls back to a list of objects when it
+    gets a value which does not fit the array (NULL and etc).
+    """
+
+    def __init__(self, names: t.Sequence[str], py_types: t.Sequence[t.Any]):
+        self.names = names
+        self.data: t.List[t.Any] = [
+            array(TYPECODES[py_type]) if py_type in TYPECODES else []
+            for py_type in py_types
+        ]
+
+    def extend(self, records: t.Sequence[t.Iterable]):
+        """Append the records values to the columns."""
+        if not records:
+            return
+
+        data = self.data
+        for idx, values in enumerate(zip(*records)):
+            column = data[idx]
+            size = len(column)
+            try:
+                column.extend(values)
+            except (TypeError, OverflowError):
+                # array.extend may have appended a part of the values
+                data[idx] = column = column[:size].tolist()
+                column.extend(values)
+
+    def result(self) -> t.Dict[str, t.Any]:
+        """Get the columns as NumPy arrays (when installed) or arrays/lists."""
+        if np is None:
+            return dict(zip(self.names, self.data))
+
+        return {
+            name: np.frombuffer(column, dtype=NUMPY_TYPES[column.typecode])
+            if isinstance(column, array) else np.array(column, dtype=object)
+            for name, column in zip(self.names, self.data)
+        }
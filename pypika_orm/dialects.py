@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import typing as t
+from copy import copy
+from sqlite3 import sqlite_version_info
 
-from pypika.queries import Table
+from pypika.queries import Field, Table, Term, builder
 from pypika.dialects import (
     Dialects, PostgreSQLQueryBuilder,
     MySQLQuery, MySQLQueryBuilder, SQLLiteQueryBuilder
 )
+from pypika.terms import Star, Values
+from pypika.utils import QueryException
 
 from . import fields
 from .query import ModelBuilderMixin, ModelQuery, ModelCreateQueryBuilder, ModelDropQueryBuilder
@@ -28,6 +32,9 @@ class ModelPostgreSQLQuery(ModelQuery):
 class ModelPostgreSQLQueryBuilder(ModelBuilderMixin, PostgreSQLQueryBuilder):
 
     QUERY_CLS = ModelPostgreSQLQuery
+    PLACEHOLDER = '${}'
+    MAX_PARAMS = 32767
+    SUPPORTS_RETURNING = True
     DB_TYPES = {
         fields.Auto: 'SERIAL',
         fields.BigAuto: 'BIGSERIAL',
@@ -39,6 +46,51 @@ class ModelPostgreSQLQueryBuilder(ModelBuilderMixin, PostgreSQLQueryBuilder):
         fields.UUID: 'UUID',
         fields.UUIDB: 'BYTEA',
     }
+    CAST_TYPES = {
+        fields.Auto: 'INTEGER',
+        fields.BigAuto: 'BIGINT',
+    }
+
+    async def generate_keys(self, count: int) -> t.Optional[t.Sequence]:
+        """Take the keys of a multi-rows insert from the sequence of a serial primary key.
+
+        RETURNING doesn't guarantee the order of the inserted rows.
+        """
+        meta = self._model.meta
+        if count == 1 or not isinstance(meta.pk_field, (fields.Auto, fields.BigAuto)):
+            return None
+
+        records = await self.get_db().fetchall(
+            'SELECT nextval(pg_get_serial_sequence($1, $2)) FROM generate_series(1, $3)',
+            f'"{meta.table_name}"', meta.primary_key, count)
+        pks = [rec[0] for rec in records]
+        return None if None in pks else pks
+
+    def __copy__(self) -> ModelPostgreSQLQueryBuilder:
+        newone = super(ModelPostgreSQLQueryBuilder, self).__copy__()
+        newone._returns = copy(self._returns)
+        newone._on_conflict_fields = copy(self._on_conflict_fields)
+        newone._on_conflict_do_updates = copy(self._on_conflict_do_updates)
+        return newone
+
+    def param(self, field: fields.Field, value: t.Any) -> Term:
+        """Postgres cannot infer types of parameters in expressions like CASE."""
+        field_type = type(field)
+        cast_type = self.CAST_TYPES.get(field_type) or self.DB_TYPES.get(field_type, field.db_type)
+        return TypedValue(value if value is None else field.to_db(value), cast_type)
+
+
+class TypedValue(fields.Value):
+    """A bind parameter with an explicit type cast (Postgres)."""
+
+    def __init__(self, value: t.Any, db_type: str, **kwargs):
+        super(TypedValue, self).__init__(value, **kwargs)
+        self.db_type = db_type
+
+    def get_sql(self, quote_char: t.Optional[str] = None, params: t.Optional[t.List] = None,
+                **kwargs) -> str:
+        sql = super(TypedValue, self).get_sql(quote_char=quote_char, params=params, **kwargs)
+        return f"{sql}::{self.db_type}"
 
 
 DIALECT_TO_BUILDER[Dialects.POSTGRESQL] = ModelPostgreSQLQueryBuilder
@@ -66,6 +118,8 @@ class ModelMySQLQuery(MySQLQuery):
 class ModelMySQLQueryBuilder(ModelBuilderMixin, MySQLQueryBuilder):
 
     QUERY_CLS = ModelMySQLQuery
+    PLACEHOLDER = '%s'
+    MAX_PARAMS = 65535
     DB_TYPES = {
         fields.Auto: 'INTEGER AUTO_INCREMENT',
         fields.BigAuto: 'BIGINT AUTO_INCREMENT',
@@ -77,6 +131,46 @@ class ModelMySQLQueryBuilder(ModelBuilderMixin, MySQLQueryBuilder):
         fields.UUIDB: 'VARBINARY(16)',
     }
 
+    @builder
+    def on_conflict(self, *target_fields: t.Any):
+        """MySQL checks all unique keys, so the target fields are not used."""
+        if not self._insert_table:
+            raise QueryException("On conflict only applies to insert query")
+
+    @builder
+    def do_nothing(self):
+        self._ignore = True
+
+    @builder
+    def do_update(self, update_field: t.Union[str, Field], update_value: t.Any = None):
+        field = Field(update_field) if isinstance(update_field, str) else update_field
+        value = Values(field) if update_value is None else self.wrap_constant(update_value)
+        self._duplicate_updates.append((field, value))
+
+    async def insert_returning(self, count: int) -> t.Optional[t.Sequence]:
+        """MySQL returns the first generated id of a multi-rows insert.
+
+        The other ids are calculated with `auto_increment_increment`. With the "interleaved"
+        lock mode (`innodb_autoinc_lock_mode=2`, the default since MySQL 8) ids of a multi-rows
+        insert may be not consecutive, so the rows are inserted one by one.
+        """
+        if not isinstance(self._model.meta.pk_field, (fields.Auto, fields.BigAuto)):
+            await self.run('execute')
+            return None
+
+        step = 1
+        if count > 1:
+            db = self.get_db()
+            row = await db.fetchone(
+                'SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode')
+            if row is None or row[1] == 2:
+                return await self.insert_rows_returning()
+
+            step = row[0]
+
+        first = await self.run('execute')
+        return range(first, first + count * step, step)
+
 
 class ModelMySQLCreateQueryBuilder(ModelCreateQueryBuilder):
 
@@ -104,6 +198,65 @@ class ModelSQLLiteQuery(ModelQuery):
 class ModelSQLLiteQueryBuilder(ModelBuilderMixin, SQLLiteQueryBuilder):
 
     QUERY_CLS = ModelSQLLiteQuery
+    PLACEHOLDER = '?'
+    SUPPORTS_RETURNING = sqlite_version_info >= (3, 35)
+
+    def __init__(self, *args, **kwargs):
+        super(ModelSQLLiteQueryBuilder, self).__init__(*args, **kwargs)
+        self._returns: t.List[Term] = []
+        self._on_conflict = False
+        self._on_conflict_fields: t.List[Term] = []
+        self._on_conflict_do_nothing = False
+        self._on_conflict_do_updates: t.List[t.Tuple[Term, t.Optional[Term]]] = []
+        self._on_conflict_wheres = None
+        self._on_conflict_do_update_wheres = None
+
+    def __copy__(self) -> ModelSQLLiteQueryBuilder:
+        newone = super(ModelSQLLiteQueryBuilder, self).__copy__()
+        newone._returns = copy(self._returns)
+        newone._on_conflict_fields = copy(self._on_conflict_fields)
+        newone._on_conflict_do_updates = copy(self._on_conflict_do_updates)
+        return newone
+
+    @builder
+    def returning(self, *terms: t.Any):
+        self._returns += [
+            (Star() if term == '*' else Field(term)) if isinstance(term, str) else term
+            for term in terms
+        ]
+
+    # SQLite (3.24+) supports the same upsert syntax as Postgres
+    on_conflict = PostgreSQLQueryBuilder.on_conflict
+    do_nothing = PostgreSQLQueryBuilder.do_nothing
+    do_update = PostgreSQLQueryBuilder.do_update
+    _conflict_field_str = PostgreSQLQueryBuilder._conflict_field_str
+    _on_conflict_sql = PostgreSQLQueryBuilder._on_conflict_sql
+    _on_conflict_action_sql = PostgreSQLQueryBuilder._on_conflict_action_sql
+
+    def get_sql(self, **kwargs: t.Any) -> str:
+        querystring = super(ModelSQLLiteQueryBuilder, self).get_sql(**kwargs)
+        if not querystring:
+            return querystring
+
+        kwargs.setdefault('quote_char', self.QUOTE_CHAR)
+        if self._on_conflict:
+            querystring += self._on_conflict_sql(**kwargs)
+            querystring += self._on_conflict_action_sql(**kwargs)
+
+        if self._returns:
+            querystring += ' RETURNING ' + ','.join(
+                term.get_sql(with_namespace=False, **kwargs) for term in self._returns)
+
+        return querystring
+
+    async def insert_returning(self, count: int) -> t.Optional[t.Sequence]:
+        # SQLite assigns sequential rowids (an auto primary key is the rowid) to the inserted
+        # rows and reports the last one
+        if isinstance(self._model.meta.pk_field, fields.Auto):
+            last = await self.run('execute')
+            return range(last - count + 1, last + 1)
+
+        return await super(ModelSQLLiteQueryBuilder, self).insert_returning(count)
 
 
 DIALECT_TO_BUILDER[Dialects.SQLLITE] = ModelSQLLiteQueryBuilder
@@ -4,14 +4,48 @@ import typing as t
 
 import datetime
 import decimal
+import uuid
 
-from pypika.queries import Field as _Field
+from pypika.queries import Field as _Field, Table
+from pypika.terms import Node, Term, ValueWrapper
+from pypika.utils import format_alias_sql
 
 
 if t.TYPE_CHECKING:
     from .model import Model
 
 
+MISSING = object()
+
+
+class _Default:
+    """Placeholder of a callable default which is evaluated on first access."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return 'DEFAULT'
+
+    def __reduce__(self) -> str:
+        # Copies and pickles keep the singleton
+        return 'DEFAULT'
+
+
+DEFAULT = _Default()
+
+
+class Value(ValueWrapper):
+    """A constant which is sent to a database as a bind parameter."""
+
+    def get_sql(self, quote_char: t.Optional[str] = None, params: t.Optional[t.List] = None,
+                **kwargs) -> str:
+        if params is None:
+            return super(Value, self).get_sql(quote_char=quote_char, **kwargs)
+
+        placeholder = params.add(self)  # type: ignore
+        return format_alias_sql(placeholder, self.alias, quote_char=quote_char, **kwargs)
+
+
 class FieldMeta(type):
 
     py_type: t.Type
@@ -34,7 +68,10 @@ class FieldAccessor:
 
     def __get__(self, model, instance_type=None):
         if model is not None:
-            return model.__data__.get(self.name)
+            value = model.__data__.get(self.name)
+            if value is DEFAULT:
+                value = model.__data__[self.name] = self.field.default()
+            return value
         return self.field
 
     def __set__(self, model, value):
@@ -42,24 +79,122 @@ class FieldAccessor:
         model.__dirty__.add(self.name)
 
 
+class SlotAccessor:
+    """Access a field value of a slotted model by the field's position."""
+
+    __slots__ = 'name', 'field', 'index', 'mask'
+
+    def __init__(self, name: str, field: Field, index: int):
+        self.name = name
+        self.field = field
+        self.index = index
+        self.mask = 1 << index
+
+    def __get__(self, model, instance_type=None):
+        if model is not None:
+            value = model.__data__[self.index]
+            if value is DEFAULT:
+                value = model.__data__[self.index] = self.field.default()
+            return value
+        return self.field
+
+    def __set__(self, model, value):
+        model.__data__[self.index] = value
+        model.__dirty__ |= self.mask
+
+
+class RelatedAccessor:
+    """Access related model instances which are loaded with a join or prefetch."""
+
+    __slots__ = 'name',
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, model, instance_type=None):
+        if model is None:
+            return self
+
+        related = getattr(model, '__related__', None)
+        if related is None or self.name not in related:
+            raise AttributeError(
+                f"{type(model).__name__!r} object has no loaded relation {self.name!r}")
+
+        return related[self.name]
+
+    def __set__(self, model, value):
+        model._relate(self.name, value)
+
+
 class Field(_Field, metaclass=FieldMeta):
 
     py_type: t.Type
     db_type: str
 
     name: str
+    model: t.Type[Model]
+    alias: t.Optional[str] = None
 
-    def __init__(self, null: bool = None, default: t.Any = None, **meta):
+    def __init__(self, null: t.Optional[bool] = None, default: t.Any = None, **meta):
         self.null = null
         self.default = default
         self.meta = meta
 
-    def bind(self, model: 'Model', name: str):
+    def wrap_constant(self, val, wrapper_cls: t.Optional[t.Type[Term]] = None) -> Term:
+        """Wrap the value compared with the field converting it to the database type."""
+        if not (val is None or isinstance(val, (Node, list, tuple))):
+            val = self.to_db(val)
+        return _Field.wrap_constant(val, wrapper_cls or Value)
+
+    def to_python(self, value: t.Any) -> t.Any:
+        """Convert a value from a database (not NULL) to the python type."""
+        return value
+
+    def to_db(self, value: t.Any) -> t.Any:
+        """Convert a value (not NULL) to a database parameter."""
+        return value
+
+    @property
+    def python_converter(self) -> t.Optional[t.Callable]:
+        """Get the `to_python` converter if the field has one."""
+        return None if type(self).to_python is Field.to_python else self.to_python
+
+    @property
+    def db_converter(self) -> t.Optional[t.Callable]:
+        """Get the `to_db` converter if the field has one."""
+        return None if type(self).to_db is Field.to_db else self.to_db
+
+    @property  # type: ignore
+    def table(self) -> t.Optional[Table]:
+        """Get the field's table (the bound model's table by default)."""
+        table = self.__dict__.get('_table', MISSING)
+        if table is not MISSING:
+            return table
+
+        model = self.__dict__.get('model')
+        return model and model.meta.table
+
+    @table.setter
+    def table(self, table: t.Optional[Table]):
+        self._table = table
+
+    def clone(self) -> Field:
+        """Copy the field to bind it to another model."""
+        field = object.__new__(type(self))
+        field.__dict__.update(self.__dict__)
+        field.__dict__.pop('_table', None)
+        return field
+
+    def bind(self, model: t.Type[Model], name: str):
         self.name = name
-        self.table = model.meta.table
+        self.model = model
 
-        model.meta.fields[name] = self
-        setattr(model, name, FieldAccessor(name, self))
+        fields = model.meta.fields
+        fields[name] = self
+        if model.meta.slots:
+            setattr(model, name, SlotAccessor(name, self, list(fields).index(name)))
+        else:
+            setattr(model, name, FieldAccessor(name, self))
 
 
 class Auto(Field, int):
@@ -81,6 +216,9 @@ class Blob(Field, bytes):
 class Bool(Field, int):
     db_type = 'SMALLINT'
 
+    def to_python(self, value: t.Any) -> bool:
+        return bool(value)
+
 
 class Char(Field, str):
     db_type = 'CHAR'
@@ -89,14 +227,29 @@ class Char(Field, str):
 class Date(Field, datetime.date):
     db_type = 'DATE'
 
+    def to_python(self, value: t.Any) -> datetime.date:
+        if isinstance(value, str):
+            return datetime.date.fromisoformat(value)
+        return value
+
 
 class Datetime(Field, datetime.datetime):
     db_type = 'DATETIME'
 
+    def to_python(self, value: t.Any) -> datetime.datetime:
+        if isinstance(value, str):
+            return datetime.datetime.fromisoformat(value)
+        return value
+
 
 class Decimal(Field, decimal.Decimal):
     db_type = 'DECIMAL'
 
+    def to_python(self, value: t.Any) -> decimal.Decimal:
+        if isinstance(value, decimal.Decimal):
+            return value
+        return decimal.Decimal(str(value))
+
 
 class Double(Field, float):
     db_type = 'REAL'
@@ -121,14 +274,35 @@ class Text(Field, str):
 class Time(Field, datetime.time):
     db_type = 'TIME'
 
+    def to_python(self, value: t.Any) -> datetime.time:
+        if isinstance(value, str):
+            return datetime.time.fromisoformat(value)
+        return value
+
 
 class UUID(Field, str):
     db_type = 'TEXT'
 
+    def to_python(self, value: t.Any) -> str:
+        return str(value)
+
+    def to_db(self, value: t.Any) -> str:
+        return str(value)
+
 
 class UUIDB(Field, bytes):
     db_type = 'BLOB'
 
+    def to_python(self, value: t.Any) -> uuid.UUID:
+        if isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(bytes=bytes(value))
+
+    def to_db(self, value: t.Any) -> bytes:
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        return value
+
 
 class Varchar(Field, str):
 
@@ -141,12 +315,29 @@ class Varchar(Field, str):
         return f"VARCHAR({self.max_length})"
 
 
-class ForeignKey(Field, type):
+class ForeignKey(Field):
 
-    def __init__(self, rel_field: Field, **kwargs):
+    def __init__(self, rel_field: Field, related_name: t.Optional[str] = None, **kwargs):
         self.rel_field = rel_field
+        self._related_name = related_name
         super(ForeignKey, self).__init__(**kwargs)
 
+    @property
+    def relation_name(self) -> str:
+        """An attribute name for the related instance (`role_id` -> `role`)."""
+        if self.name.endswith('_id'):
+            return self.name[:-3]
+        return self.rel_field.model.meta.table_name
+
+    @property
+    def related_name(self) -> str:
+        """An attribute name for the reverse relation (`role.users`)."""
+        return self._related_name or f"{self.model.meta.table_name}s"
+
+    @property
+    def py_type(self) -> t.Any:  # type: ignore[override]
+        return self.rel_field.py_type
+
     @property
     def db_type(self):
         if not isinstance(self.rel_field, Auto):
@@ -157,6 +348,22 @@ class ForeignKey(Field, type):
 
         return Integer.db_type
 
-    def bind(self, model: 'Model', name: str):
+    def to_python(self, value: t.Any) -> t.Any:
+        return self.rel_field.to_python(value)
+
+    def to_db(self, value: t.Any) -> t.Any:
+        return self.rel_field.to_db(value)
+
+    @property
+    def python_converter(self) -> t.Optional[t.Callable]:
+        return self.rel_field.python_converter
+
+    @property
+    def db_converter(self) -> t.Optional[t.Callable]:
+        return self.rel_field.db_converter
+
+    def bind(self, model: t.Type[Model], name: str):
         super(ForeignKey, self).bind(model, name)
         model.meta.foreign_keys[name] = self
+        model._add_relation(self.relation_name)
+        self.rel_field.model._add_relation(self.related_name)
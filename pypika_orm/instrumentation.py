@@ -0,0 +1,230 @@
+"""Observe the queries which are run by the query builders."""
+
+from __future__ import annotations
+
+import logging
+import re
+import typing as t
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from .backends import TBatches, aclosing, iterate, percentile
+
+
+if t.TYPE_CHECKING:
+    from .model import Model
+    from .query import ModelDBMixin
+
+
+logger = logging.getLogger('pypika-orm')
+logger.addHandler(logging.NullHandler())
+
+current_event: ContextVar[t.Optional[QueryEvent]] = ContextVar('query_event', default=None)
+
+Hook = t.Callable[['QueryEvent'], t.Any]
+
+
+class QueryEvent:
+    """A query run: SQL, parameters, timings (in seconds) and a number of rows."""
+
+    __slots__ = (
+        'model', 'method', 'sql', 'params', 'compile_time', 'db_time', 'hydrate_time', 'rows')
+
+    def __init__(self, model: t.Optional[t.Type[Model]], method: str):
+        self.model = model
+        self.method = method
+        self.sql: t.Optional[str] = None
+        self.params: t.Tuple = ()
+        self.compile_time = 0.0
+        self.db_time = 0.0
+        self.hydrate_time = 0.0
+        self.rows: t.Optional[int] = None
+
+    def __repr__(self) -> str:
+        return f"<QueryEvent {self.method} {self.sql!r} {self.duration * 1000:.3f}ms>"
+
+    @property
+    def duration(self) -> float:
+        return self.compile_time + self.db_time + self.hydrate_time
+
+
+class Instrumentation:
+    """Registry of callbacks which are called before and after the queries.
+
+    Before hooks get an event with compiled SQL, after hooks get it with the timings and
+    the number of rows. Async callbacks are awaited.
+    """
+
+    def __init__(self):
+        self.before_hooks: t.List[Hook] = []
+        self.after_hooks: t.List[Hook] = []
+
+    def __repr__(self) -> str:
+        return f"<Instrumentation before={len(self.before_hooks)} after={len(self.after_hooks)}>"
+
+    def before(self, fn: Hook) -> Hook:
+        """Register a callback to call before the queries (can be used as a decorator)."""
+        self.before_hooks.append(fn)
+        return fn
+
+    def after(self, fn: Hook) -> Hook:
+        """Register a callback to call after the queries (can be used as a decorator)."""
+        self.after_hooks.append(fn)
+        return fn
+
+    async def emit(self, hooks: t.Sequence[Hook], event: QueryEvent):
+        for fn in hooks:
+            res = fn(event)
+            if res is not None and hasattr(res, '__await__'):
+                await res
+
+    @asynccontextmanager
+    async def track(self, query: ModelDBMixin, method: str) -> t.AsyncIterator[QueryEvent]:
+        """Collect an event for a query which results are hydrated within the block."""
+        event = QueryEvent(query._model, method)
+        token = current_event.set(event)
+        try:
+            yield event
+
+        # A stream of results is closed early
+        except GeneratorExit:
+            if event.sql is not None:
+                await self.emit(self.after_hooks, event)
+            raise
+
+        finally:
+            current_event.reset(token)
+
+        if event.sql is not None:
+            await self.emit(self.after_hooks, event)
+
+    async def run(self, query: ModelDBMixin, method: str, *args,
+                  compiled: t.Optional[t.Tuple[str, t.Tuple]] = None, **kwargs) -> t.Any:
+        """Compile (unless it's compiled) and run the query measuring the time spent."""
+        event = current_event.get()
+        tracked = event is not None and event.sql is None and event.method == method
+        if not tracked:
+            event = QueryEvent(query._model, method)
+
+        assert event
+        start = perf_counter()
+        db = query.get_db()
+        event.sql, event.params = sql, params = compiled or query.compile()
+        event.compile_time = perf_counter() - start
+        await self.emit(self.before_hooks, event)
+
+        start = perf_counter()
+        res = await query.run_sql(db, method, sql, params, *args, **kwargs)
+        event.db_time = perf_counter() - start
+        if method == 'fetchall':
+            event.rows = len(res)
+        elif method == 'fetchone':
+            event.rows = int(res is not None)
+
+        if not tracked:
+            await self.emit(self.after_hooks, event)
+
+        return res
+
+
+    async def stream(self, query: ModelDBMixin, method: str, size: int) -> TBatches:
+        """Compile the query and fetch its records by batches measuring the time spent."""
+        event = current_event.get()
+        tracked = event is not None and event.sql is None and event.method == method
+        if not tracked:
+            event = QueryEvent(query._model, method)
+
+        assert event
+        start = perf_counter()
+        db = query.get_db()
+        event.sql, event.params = sql, params = query.compile()
+        event.compile_time = perf_counter() - start
+        await self.emit(self.before_hooks, event)
+
+        event.rows = 0
+        async with aclosing(iterate(db, sql, params, size)) as batches:
+            while True:
+                start = perf_counter()
+                try:
+                    records = await batches.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    event.db_time += perf_counter() - start
+
+                event.rows += len(records)
+                yield records
+
+        if not tracked:
+            await self.emit(self.after_hooks, event)
+
+
+IN_RE = re.compile(r'\bIN \((?:[^()]*?)\)', re.IGNORECASE)
+VALUES_RE = re.compile(r'\bVALUES (\([^()]*\))(?:,\s*\([^()]*\))+', re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse the lists of values (`IN (...)`, multi-row `VALUES`) to group the queries."""
+    sql = IN_RE.sub('IN (...)', sql)
+    return VALUES_RE.sub(r'VALUES \1, ...', sql)
+
+
+class QueryStats:
+    """Aggregate the queries timings by normalized SQL (use it as an after hook).
+
+    The latest `history` durations are kept per query to calculate the percentiles.
+    """
+
+    def __init__(self, history: int = 1000):
+        self.history = history
+        self.queries: t.Dict[str, t.Dict[str, t.Any]] = {}
+
+    def __repr__(self) -> str:
+        return f"<QueryStats queries={len(self.queries)}>"
+
+    def __call__(self, event: QueryEvent):
+        key = normalize_sql(event.sql or '')
+        query = self.queries.get(key)
+        if query is None:
+            query = self.queries[key] = {
+                'count': 0, 'total': 0.0, 'rows': 0, 'durations': deque(maxlen=self.history)}
+
+        duration = event.duration
+        query['count'] += 1
+        query['total'] += duration
+        query['rows'] += event.rows or 0
+        query['durations'].append(duration)
+
+    def report(self) -> t.List[t.Dict[str, t.Any]]:
+        """Get the queries stats ordered by the total time."""
+        report = []
+        for sql, query in self.queries.items():
+            durations = sorted(query['durations'])
+            report.append({
+                'sql': sql, 'count': query['count'], 'total': query['total'],
+                'rows': query['rows'], 'p50': percentile(durations, 50),
+                'p95': percentile(durations, 95), 'p99': percentile(durations, 99),
+            })
+
+        return sorted(report, key=lambda stats: stats['total'], reverse=True)
+
+    def clear(self):
+        self.queries.clear()
+
+
+class SlowQueryLog:
+    """Log the queries which take longer than the threshold (in seconds)."""
+
+    def __init__(self, threshold: float, log: logging.Logger = logger):
+        self.threshold = threshold
+        self.log = log
+
+    def __call__(self, event: QueryEvent):
+        duration = event.duration
+        if duration >= self.threshold:
+            self.log.warning(
+                'Slow query (%.3fs: compile %.3fs, db %.3fs, hydrate %.3fs, rows %s): %s %r',
+                duration, event.compile_time, event.db_time, event.hydrate_time, event.rows,
+                event.sql, event.params)
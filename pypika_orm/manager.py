@@ -1,10 +1,16 @@
 import typing as t
+from contextlib import asynccontextmanager
 
 from aio_databases import Database
 from pypika.enums import Dialects
 
+from . import backends
+from .cache import MemoryResultCache, QueryCache, ResultCache
+from .instrumentation import Hook, Instrumentation, SlowQueryLog
 from .model import Model
-from .query import ModelQueryBuilder
+from .query import ModelDBMixin, ModelQueryBuilder
+from .routing import Router
+from .session import Session, current_session
 from .dialects import DIALECT_TO_BUILDER
 
 
@@ -20,37 +26,91 @@ class Manager:
 
     db: t.Optional[Database] = None
     dialect: t.Optional[Dialects] = None
+    cache: t.Optional[QueryCache] = None
+    results: ResultCache
+    pool: t.Optional[backends.PoolMonitor] = None
+    replicas: t.Sequence[Database] = ()
+    router: t.Optional[Router] = None
+    instrumentation: t.Optional[Instrumentation] = None
+
+    def __init__(self, database: t.Optional[t.Union[Database, str]] = None, *,
+                 dialect: t.Optional[str] = None, cache_size: int = 256,
+                 statements_cache_size: int = 128, results_cache: t.Optional[ResultCache] = None,
+                 pool_size: t.Optional[int] = None, pool_min_size: t.Optional[int] = None,
+                 pool_timeout: t.Optional[float] = None, pool_recycle: t.Optional[float] = None,
+                 replicas: t.Sequence[t.Union[Database, str]] = (),
+                 replicas_policy: str = 'round-robin',
+                 slow_query_threshold: t.Optional[float] = None):
+        """Initialize dialect and database.
+
+        Pool options are passed to the backends of the databases which are created by URLs:
+        max and min size, seconds after which idle connections are recycled, a size of the
+        prepared statements cache per connection (asyncpg); `pool_timeout` limits waiting for
+        a connection. Given `Database` instances keep their own options (pass them to the
+        database), a pool monitor is shared by the managers of a database.
+
+        Read queries are routed to the replica databases (if any) by the given policy
+        ('round-robin' or 'least-busy').
+
+        Queries which take longer than `slow_query_threshold` seconds are logged.
+        """
+        if cache_size:
+            self.cache = QueryCache(cache_size)
+
+        self.results = MemoryResultCache() if results_cache is None else results_cache
+
+        if slow_query_threshold is not None:
+            self.instrument(after=SlowQueryLog(slow_query_threshold))
 
-    def __init__(self, database: t.Union[Database, str] = None, *, dialect: str = None):
-        """Initialize dialect and database."""
         if dialect:
             self.dialect = Dialects(_dialects.get(dialect, dialect))
 
         if database:
-            if isinstance(database, str):
-                database = Database(database)
+            monitors = []
+            databases = []
+            for db in (database, *replicas):
+                timeout: t.Optional[float] = None
+                if isinstance(db, str):
+                    db = Database(db)
+                    db.backend.options.update(backends.get_pool_options(
+                        db, size=pool_size, min_size=pool_min_size, recycle=pool_recycle,
+                        statements=statements_cache_size))
+                    timeout = pool_timeout
+
+                databases.append(db)
+                monitors.append(backends.get_monitor(db, timeout=timeout))
 
-            self.db = database
-            self.dialect = Dialects(
-                _dialects.get(database.backend.db_type, database.backend.db_type))
+            self.db, *self.replicas = databases
+            self.dialect = Dialects(_dialects.get(self.db.backend.db_type, self.db.backend.db_type))
+            self.pool, *replicas_monitors = monitors
+            if self.replicas:
+                self.router = Router(
+                    self.db, self.replicas, replicas_policy, monitors=replicas_monitors)
 
     def __call__(self, model: t.Type[Model], **kwargs) -> ModelQueryBuilder:
         """Create a query builder."""
         builder_cls = DIALECT_TO_BUILDER.get(self.dialect, ModelQueryBuilder)
         if builder_cls is ModelQueryBuilder:
             kwargs['dialect'] = self.dialect
-        return builder_cls(model, db=self.db, **kwargs)
+        return builder_cls(
+            model, db=self.db, cache=self.cache, results=self.results, router=self.router,
+            hooks=self.instrumentation, **kwargs)
 
     async def __aenter__(self):
         """Init database."""
         assert self.db, 'DB is not initialized'
         await self.db.__aenter__()
+        for replica in self.replicas:
+            await replica.__aenter__()
         return self
 
-    def __aexit__(self, *args):
+    async def __aexit__(self, *args):
         """Close database."""
         assert self.db, 'DB is not initialized'
-        return self.db.__aexit__(*args)
+        for replica in self.replicas:
+            await replica.__aexit__(*args)
+
+        return await self.db.__aexit__(*args)
 
     def __getattr__(self, name: str):
         """Proxy self methods."""
@@ -69,12 +129,130 @@ class Manager:
     def __repr__(self) -> str:
         return f"<Manager {self}>"
 
-    async def save(self, model: Model) -> Model:
+    def pool_stats(self) -> t.Dict[str, t.Any]:
+        """Get connections in use/idle, acquisition wait time percentiles and timeouts."""
+        assert self.pool, 'DB is not initialized'
+        stats = self.pool.stats()
+        if self.router is not None:
+            stats['replicas'] = [monitor.stats() for monitor in self.router.monitors.values()]
+
+        return stats
+
+    def instrument(self, *, before: t.Optional[Hook] = None,
+                   after: t.Optional[Hook] = None) -> Instrumentation:
+        """Register callbacks to call before/after the queries of the manager's builders.
+
+        The callbacks get `QueryEvent` with the model, SQL, params, compile/db/hydration time
+        and the number of rows (after the query). Use `QueryStats` to aggregate the events.
+        """
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation()
+
+        if before is not None:
+            self.instrumentation.before(before)
+
+        if after is not None:
+            self.instrumentation.after(after)
+
+        return self.instrumentation
+
+    @asynccontextmanager
+    async def session(self) -> t.AsyncIterator[Session]:
+        """Open an identity map scope: rows loaded within it are hydrated once per primary key."""
+        session = Session(self.db)
+        token = current_session.set(session)
+        try:
+            yield session
+        finally:
+            current_session.reset(token)
+
+    async def gather(self, *queries: t.Any, concurrency: t.Optional[int] = None) -> t.List[t.Any]:
+        """Run the queries (query builders or awaitables) concurrently.
+
+        See `Manager.map` for details.
+        """
+        return await self.map(_identity, queries, concurrency=concurrency)
+
+    async def map(self, fn: t.Callable[[t.Any], t.Any], items: t.Iterable, *,
+                  concurrency: t.Optional[int] = None) -> t.List[t.Any]:
+        """Run `fn(item)` queries for the items concurrently and return results in order.
+
+        Select query builders are resolved with `fetchall`, other builders are executed.
+        The queries are run on separate pooled connections, not more than the given
+        concurrency (the pool size by default) at once. Inside a transaction or without a
+        pool they are run one by one on the current connection.
+        """
+        assert self.db, 'DB is not initialized'
+        items = list(items)
+        if not backends.supports_concurrency(self.db):
+            return [await _resolve(fn(item)) for item in items]
+
+        limit = concurrency or backends.get_pool_size(self.db) or len(items)
+        results: t.List[t.Any] = [None] * len(items)
+        pending = iter(enumerate(items))
+
+        async def worker():
+            for idx, item in pending:
+                results[idx] = await _resolve(fn(item))
+
+        await backends.run_concurrently(
+            (self.db, *self.replicas), [worker() for _ in range(min(limit, len(items)))])
+        return results
+
+    async def save(self, model: Model, *, force_insert: bool = False) -> Model:
+        """Insert the model or update its changed fields when the primary key is set."""
         assert isinstance(model, Model), '{model} is not an instance of `Model`'
-        primary_key = model.meta.primary_key
+        meta = model.meta
+        primary_key = meta.primary_key
+
+        if not force_insert and primary_key and getattr(model, primary_key):
+            changes = model._changes()
+            changes.pop(primary_key, None)
+            if changes:
+                qs = self(type(model)).update().where(meta.pk_field == model._pk)
+                for name, value in changes.items():
+                    qs = qs.set(meta.fields[name], value)
+
+                await qs.execute()
+
+            model._clean()
+            return model
+
+        # Copy the generated primary key (and other returned values) to the given model
+        inserted = await self(type(model)).insert(**model._values()).execute()
+        for name, value in inserted._values().items():
+            setattr(model, name, value)
+
+        model._clean()
+        return model
+
+    async def bulk_update(self, models: t.Sequence[Model], fields: t.Optional[t.Sequence] = None, *,
+                          batch_size: int = 1000) -> int:
+        """Update the given models with a statement per batch.
+
+        All the fields except primary keys are updated when fields are not given.
+        """
+        groups: t.Dict[t.Type[Model], t.List[Model]] = {}
+        for model in models:
+            assert isinstance(model, Model), '{model} is not an instance of `Model`'
+            groups.setdefault(type(model), []).append(model)
+
+        count = 0
+        for model_cls, group in groups.items():
+            count += await self(model_cls).update_many(
+                group, fields or model_cls.meta.field_names, batch_size=batch_size)
+
+        return count
+
+
+def _identity(item: t.Any) -> t.Any:
+    return item
+
 
-        if primary_key and getattr(model, primary_key):
-            # TODO: Do update
-            pass
+def _resolve(query: t.Any) -> t.Awaitable:
+    if isinstance(query, ModelDBMixin):
+        if getattr(query, '_selects', None):
+            return query.fetchall()
+        return query.execute()
 
-        return await self(type(model)).insert(**model.__data__).execute()
+    return query
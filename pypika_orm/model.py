@@ -1,12 +1,14 @@
+from __future__ import annotations
+
 import typing as t
 
-from copy import deepcopy
-from pypika.queries import Table
+from time import perf_counter
+from pypika.queries import Column, Table
 
-from .fields import Field
+from .fields import DEFAULT, Field, RelatedAccessor
 
 
-INHERITANCE_OPTIONS = {'fields', 'foreign_keys', 'primary_key'}
+INHERITANCE_OPTIONS = {'fields', 'primary_key', 'slots'}
 
 
 class ModelOptions:
@@ -18,13 +20,25 @@ class ModelOptions:
     primary_key: t.Optional[str] = None
     foreign_keys: t.Dict[str, Field]
 
+    # Keep field values in a list and track changes with a bitmask (no instance __dict__)
+    slots: bool = False
+
+    # Seconds spent to prepare the model class
+    setup_time: float = 0.0
+
     def __init__(self, cls):
         """Inherit meta options."""
-        for base in reversed(cls.mro()):
-            if hasattr(base, "meta") and isinstance(base.meta, ModelOptions):
-                for k, v in base.meta.__dict__.items():
+        start = perf_counter()
+        for base in reversed(cls.__mro__[1:]):
+            meta = base.__dict__.get('meta')
+            if isinstance(meta, ModelOptions):
+                for k, v in meta.__dict__.items():
                     if k in INHERITANCE_OPTIONS:
-                        setattr(self, k, deepcopy(v))
+                        setattr(self, k, v)
+
+        # Inherited fields are cloned to be bound to the model
+        if 'fields' in self.__dict__:
+            self.fields = {name: field.clone() for name, field in self.fields.items()}
 
         if hasattr(cls, 'Meta'):
             for k, v in cls.Meta.__dict__.items():
@@ -32,46 +46,228 @@ class ModelOptions:
                     setattr(self, k, v)
 
         self.setup(cls)
+        self.setup_time = perf_counter() - start
 
     def setup(self, cls):
         """Setup the options."""
         cls.meta = self
 
         self.table_name = self.table_name or cls.__name__.lower()
-        self.table = Table(self.table_name)  # TODO: do we need it?
         self.foreign_keys = {}
 
         self.fields = getattr(self, 'fields', {})
         for name, field in self.fields.items():
             field.bind(cls, name)
 
-        for name, attr in cls.__dict__.items():
+        for name, attr in list(cls.__dict__.items()):
             if isinstance(attr, Field):
                 attr.bind(cls, name)
 
         if not self.primary_key and self.fields:
             self.primary_key = list(self.fields.keys())[0]
 
+        self.prepare()
+
+    def prepare(self):
+        """Precompute the fields metadata which is used by the models and the builders."""
+        fields = self.fields
+        self.field_names: t.Tuple[str, ...] = tuple(fields)
+        self.field_list: t.Tuple[Field, ...] = tuple(fields.values())
+        self.field_index = {name: idx for idx, name in enumerate(self.field_names)}
+        self.pk_index = self.field_index.get(self.primary_key) if self.primary_key else None
+
+        # (index, name, default) for the fields which have static/callable defaults
+        defaults = [
+            (idx, field.name, field.default) for idx, field in enumerate(self.field_list)
+            if field.default is not None]
+        self.static_defaults = tuple(item for item in defaults if not callable(item[2]))
+        self.callable_defaults = tuple(item for item in defaults if callable(item[2]))
+
+        # Data of new instances: static defaults and placeholders for callable ones
+        self.initial_values = [None] * len(self.field_names)
+        self.initial_data: t.Dict[str, t.Any] = {}
+        for idx, name, default in defaults:
+            value = DEFAULT if callable(default) else default
+            self.initial_values[idx] = self.initial_data[name] = value
+
+        self.python_converters: t.Dict[str, t.Callable] = {}
+        self.db_converters: t.Dict[str, t.Callable] = {}
+        for name, field in fields.items():
+            python_converter, db_converter = field.python_converter, field.db_converter
+            if python_converter:
+                self.python_converters[name] = python_converter
+            if db_converter:
+                self.db_converters[name] = db_converter
+
+        # Per-dialect definitions (table columns)
+        self.templates: t.Dict[t.Any, t.Any] = {}
+
+    def get_columns(self, dialect: t.Any,
+                    db_types: t.Mapping[t.Type[Field], str]) -> t.Dict[str, Column]:
+        """Get the table columns definitions for the dialect with the given types."""
+        key = 'columns', dialect
+        columns = self.templates.get(key)
+        if columns is None:
+            columns = self.templates[key] = {field.name: Column(
+                field.name, column_type=db_types.get(type(field), field.db_type),
+                default=field.default if not callable(field.default) else None,
+                nullable=field.null,
+            ) for field in self.field_list}
+
+        return columns
+
+    @property
+    def table(self) -> Table:
+        """Get the model's table (created on first use)."""
+        table = self.__dict__.get('_table')
+        if table is None:
+            table = self._table = Table(self.table_name)
+        return table
+
+    @property
+    def pk_field(self) -> Field:
+        """Get the primary key field."""
+        assert self.primary_key, f"{self.table_name} has no primary key"
+        return self.fields[self.primary_key]
+
+    def get_relation_name(self, model: t.Type[Model]) -> str:
+        """Get an attribute name for instances of the given related model.
+
+        A foreign key `role_id` to the model gives `role`, the model's table name is used
+        otherwise.
+        """
+        for field in self.foreign_keys.values():
+            if field.rel_field.model is model:
+                return field.relation_name
+
+        return model.meta.table_name
+
+
+class ModelMeta(type):
+    """Declare empty __slots__ for models with the `slots` option."""
+
+    def __new__(mcs, name: str, bases: t.Tuple[t.Type, ...], attrs: dict):
+        slots = getattr(attrs.get('Meta'), 'slots', None)
+        if slots is None:
+            slots = any(getattr(getattr(base, 'meta', None), 'slots', False) for base in bases)
+
+        if slots:
+            attrs.setdefault('__slots__', ())
 
-class Model:
+        return super(ModelMeta, mcs).__new__(mcs, name, bases, attrs)
+
+
+class Model(metaclass=ModelMeta):
     """Base model class."""
 
+    __slots__ = '__data__', '__dirty__', '__related__', '__weakref__'
+
+    __data__: t.Any
+    __dirty__: t.Any
+    __related__: t.Dict[str, t.Any]
+
     meta: ModelOptions
 
     def __init__(self, __with_defaults__: bool = True, **values):
-        """Initialize the model."""
-        self.__data__ = {}
-        self.__dirty__: t.Set[str] = set()
+        """Initialize the model.
+
+        Callable defaults are evaluated on first access to the fields or when the values are
+        taken to be saved.
+        """
+        meta = self.meta
+        if meta.slots:
+            self.__data__ = (
+                meta.initial_values.copy() if __with_defaults__ else [None] * len(meta.field_names))
+            self.__dirty__ = 0
 
-        if __with_defaults__:
-            for name, field in self.meta.fields.items():
-                if field.default is not None:
-                    self.__data__[name] = (
-                        field.default() if callable(field.default) else field.default)
+        else:
+            self.__data__ = meta.initial_data.copy() if __with_defaults__ else {}
+            self.__dirty__ = set()
 
         for name, value in values.items():
             setattr(self, name, value)
 
+    @classmethod
+    def _from_row(cls, values: t.Iterable, names: t.Sequence[str]) -> Model:
+        """Create an instance from a database row.
+
+        Defaults are not evaluated and the instance is not marked as dirty.
+        """
+        model = cls.__new__(cls)
+        meta = cls.meta
+        if meta.slots:
+            if names == meta.field_names:
+                model.__data__ = list(values)
+
+            else:
+                model.__data__ = data = [None] * len(meta.field_names)
+                index = meta.field_index
+                for name, value in zip(names, values):
+                    if name in index:
+                        data[index[name]] = value
+
+            model.__dirty__ = 0
+
+        else:
+            model.__data__ = dict(zip(names, values))
+            model.__dirty__ = set()
+
+        return model
+
+    def _values(self) -> t.Dict[str, t.Any]:
+        """Get the field values which have been set (callable defaults are evaluated)."""
+        self._defaults()
+        data = self.__data__
+        if isinstance(data, dict):
+            return dict(data)
+
+        dirty = self.__dirty__
+        return {
+            name: value for idx, (name, value) in enumerate(zip(self.meta.field_names, data))
+            if value is not None or dirty & (1 << idx)
+        }
+
+    def _changes(self) -> t.Dict[str, t.Any]:
+        """Get the field values which have been changed since the model was loaded."""
+        data, dirty = self.__data__, self.__dirty__
+        if isinstance(data, dict):
+            return {name: data[name] for name in dirty if name in data}
+
+        return {
+            name: data[idx] for idx, name in enumerate(self.meta.field_names)
+            if dirty & (1 << idx)
+        }
+
+    def _defaults(self):
+        """Evaluate the callable defaults which have not been accessed yet."""
+        data = self.__data__
+        if isinstance(data, dict):
+            for _, name, default in self.meta.callable_defaults:
+                if data.get(name) is DEFAULT:
+                    data[name] = default()
+            return
+
+        for idx, _, default in self.meta.callable_defaults:
+            if data[idx] is DEFAULT:
+                data[idx] = default()
+
+    def _clean(self):
+        """Mark the model as synchronized with the database."""
+        self.__dirty__ = 0 if self.meta.slots else set()
+
+    def _relate(self, name: str, value: t.Any):
+        """Attach related model instances (loaded with a join or prefetch) by the given name."""
+        try:
+            self.__related__[name] = value
+        except AttributeError:
+            self.__related__ = {name: value}
+
+    @classmethod
+    def _add_relation(cls, name: str):
+        """Expose related model instances by the given name (unless it's already taken)."""
+        if not hasattr(cls, name):
+            setattr(cls, name, RelatedAccessor(name))
+
     def __init_subclass__(cls, **kwargs):
         ModelOptions(cls)
         return cls
@@ -93,4 +289,4 @@ class Model:
     @property
     def _pk(self) -> t.Any:
         """Get a primary key value."""
-        return self.meta.primary_key and self.__data__.get(self.meta.primary_key)
+        return self.meta.primary_key and getattr(self, self.meta.primary_key)
@@ -1,37 +1,126 @@
 from __future__ import annotations
 
 import typing as t
+from copy import copy
 from inspect import isclass
+from time import perf_counter
 
 from aio_databases import Database
+from pypika.terms import Case
 from pypika.queries import (
-    Column,
     CreateQueryBuilder,
     DropQueryBuilder,
     Query,
     QueryBuilder,
     Table,
+    Term,
     builder,
 )
 
-from .fields import Field
+from . import backends
+from .columns import Columns
+from .fields import MISSING, Field, ForeignKey, Value
+from .session import get_session
+
+if t.TYPE_CHECKING:
+    from .cache import QueryCache, ResultCache
+    from .instrumentation import Instrumentation, QueryEvent
+    from .routing import Router
+
+
+class Params(list):
+    """Collect bind parameters while a query is being rendered."""
+
+    def __init__(self, placeholder: str = '?'):
+        super(Params, self).__init__()
+        self.placeholder = placeholder
+
+    def add(self, term: Value) -> str:
+        """Store the term and return a placeholder for its value."""
+        self.append(term)
+        return self.placeholder.format(len(self))
+
+    @property
+    def values(self) -> t.Tuple:
+        return tuple(term.value for term in self)
 
 
 class ModelDBMixin:
 
     _db: t.Optional[Database]
+    _cache: t.Optional[QueryCache]
+    _results: t.Optional[ResultCache]
+    _router: t.Optional[Router]
+    _hooks: t.Optional[Instrumentation]
     _model: t.Type[Model]
 
+    # Selected models with their columns positions (start, end)
+    _spans: t.List[t.Tuple[t.Type[Model], int, int]] = []
+
+    # Foreign keys to load related models for
+    _prefetch: t.Tuple[ForeignKey, ...] = ()
+
+    # Return plain rows instead of models: 'dicts', 'tuples' or 'scalars'
+    _fetch_mode: t.Optional[str] = None
+
+    PLACEHOLDER: str = '?'
+
     get_sql: t.Callable[..., str]
+    load_related: t.Callable[..., t.Awaitable]
 
-    def __init__(self, *args, db: Database = None, **kwargs):
+    def __init__(self, *args, db: t.Optional[Database] = None, cache: t.Optional[QueryCache] = None,
+                 results: t.Optional[ResultCache] = None, router: t.Optional[Router] = None,
+                 hooks: t.Optional[Instrumentation] = None, **kwargs):
         self._db = db
+        self._router = router
+        self._hooks = hooks
+        self._cache = cache
+        self._results = results
         super(ModelDBMixin, self).__init__(*args, **kwargs)  # type: ignore
 
-    def execute(self, *args, **kwargs) -> t.Awaitable:
+    def compile(self, **kwargs) -> t.Tuple[str, t.Tuple]:
+        """Render SQL with bind placeholders and return it with the parameters."""
+        if self._cache is not None and not kwargs:
+            return self._cache.compile(self)
+
+        sql, params = self.render(**kwargs)
+        return sql, params.values
+
+    def render(self, **kwargs) -> t.Tuple[str, Params]:
+        """Render SQL and collect the bind parameters terms."""
+        params = Params(self.PLACEHOLDER)
+        sql = self.get_sql(params=params, **kwargs)
+        return sql, params
+
+    def run(self, method: str, *args, **kwargs) -> t.Awaitable:
+        """Compile the query and run it with the given database method."""
+        if self._hooks is not None:
+            return self._hooks.run(self, method, *args, **kwargs)
+
+        db = self.get_db()
+        sql, params = self.compile()
+        return self.run_sql(db, method, sql, params, *args, **kwargs)
+
+    def run_sql(self, db: Database, method: str, sql: str, params: t.Tuple,
+                *args, **kwargs) -> t.Awaitable:
+        """Run the compiled query with the given database method."""
+        return getattr(db, method)(sql, *params, *args, **kwargs)
+
+    def stream(self, method: str, batch_size: int) -> backends.TBatches:
+        """Compile the query and fetch its records by batches (see `backends.iterate`)."""
+        if self._hooks is not None:
+            return self._hooks.stream(self, method, batch_size)
+
+        sql, params = self.compile()
+        return backends.iterate(self.get_db(), sql, params, batch_size)
+
+    def get_db(self) -> Database:
+        """Get a database to run the query."""
         assert self._db, 'DB is not initializated'
-        sql = self.get_sql()
-        return self._db.execute(sql, *args, **kwargs)
+        return self._db
+
+    def execute(self, *args, **kwargs) -> t.Awaitable:
+        return self.run('execute', *args, **kwargs)
 
     def __await__(self):
         return self.execute().__await__()
@@ -42,30 +131,269 @@ class ModelDBMixin:
         return self._db.executemany(sql, *args, **kwargs)
 
     async def fetchall(self, *args, **kwargs) -> t.List[Model]:
-        assert self._db, 'DB is not initializated'
-        sql = self.get_sql()
-        records = await self._db.fetchall(sql, *args, **kwargs)
-        return [self._model(**dict(rec.items())) for rec in records]
+        if self._hooks is None:
+            records = await self.run('fetchall', *args, **kwargs)
+            return await self.load(records)
 
-    async def fetchone(self, *args, **kwargs) -> t.Optional[Model]:
-        assert self._db, 'DB is not initializated'
-        sql = self.get_sql()
-        rec = await self._db.fetchone(sql, *args, **kwargs)
-        if rec is None:
-            return rec
+        async with self._hooks.track(self, 'fetchall') as event:
+            records = await self.run('fetchall', *args, **kwargs)
+            start = perf_counter()
+            models = await self.load(records)
+            event.hydrate_time = perf_counter() - start
 
-        return self._model(**dict(rec.items()))
+        return models
+
+    async def fetchone(self, *args, **kwargs) -> t.Optional[Model]:
+        if self._hooks is None:
+            rec = await self.run('fetchone', *args, **kwargs)
+            if rec is None:
+                return rec
+
+            [model] = await self.load([rec])
+            return model
+
+        async with self._hooks.track(self, 'fetchone') as event:
+            rec = await self.run('fetchone', *args, **kwargs)
+            if rec is None:
+                return rec
+
+            start = perf_counter()
+            [model] = await self.load([rec])
+            event.hydrate_time = perf_counter() - start
+
+        return model
+
+    async def chunks(self, batch_size: int = 1000) -> t.AsyncGenerator[t.List[Model], None]:
+        """Iterate over the query results by lists of models.
+
+        Records are fetched lazily by batches with a server-side cursor. Close the iterator
+        to leave it early (`async with aclosing(qs.chunks()) as chunks: ...`).
+        """
+        if self._hooks is None:
+            async with backends.aclosing(self.stream('chunks', batch_size)) as batches:
+                async for records in batches:
+                    yield await self.load(records)
+            return
+
+        async with self._hooks.track(self, 'chunks') as event:
+            async with backends.aclosing(self.stream('chunks', batch_size)) as batches:
+                async for records in batches:
+                    start = perf_counter()
+                    models = await self.load(records)
+                    event.hydrate_time += perf_counter() - start
+                    yield models
+
+    async def fetch_columns(self, batch_size: int = 10000) -> t.Dict[str, t.Any]:
+        """Fetch the results as a mapping of column names to arrays.
+
+        Columns of integer and float fields are NumPy arrays (when installed) or `array.array`,
+        records are streamed by batches and are not converted into models.
+        """
+        if self._hooks is None:
+            return await self.load_columns(batch_size)
+
+        async with self._hooks.track(self, 'fetch_columns') as event:
+            return await self.load_columns(batch_size, event)
+
+    async def load_columns(
+            self, batch_size: int, event: t.Optional[QueryEvent] = None) -> t.Dict[str, t.Any]:
+        """Stream the records into columns (the conversion time is stored to the event)."""
+        columns = None
+        async with backends.aclosing(self.stream('fetch_columns', batch_size)) as batches:
+            async for records in batches:
+                start = perf_counter()
+                if columns is None:
+                    columns = self.get_columns(tuple(records[0].keys()))
+                columns.extend(records)
+                if event is not None:
+                    event.hydrate_time += perf_counter() - start
+
+        if columns is None:
+            columns = self.get_columns(())
+
+        return columns.result()
+
+    def get_columns(self, names: t.Sequence[str]) -> Columns:
+        """Prepare columns for the results with the given names."""
+        fields = self._model.meta.fields
+        selects = getattr(self, '_selects', [])
+        if names and len(selects) == len(names):
+            py_types = [getattr(term, 'py_type', None) for term in selects]
+        else:
+            py_types = [getattr(fields.get(name), 'py_type', None) for name in names]
+
+        return Columns(names, py_types)
+
+    async def iterate(self, batch_size: int = 1000) -> t.AsyncGenerator[Model, None]:
+        """Iterate over the query results by models (see `chunks`)."""
+        async with backends.aclosing(self.chunks(batch_size)) as chunks:
+            async for models in chunks:
+                for model in models:
+                    yield model
+
+    async def load(self, records: t.Sequence[t.Mapping]) -> t.List[t.Any]:
+        """Convert the records according to the fetch mode and load related models."""
+        mode = self._fetch_mode
+        if mode is None:
+            models = self.hydrate(records)
+            if self._prefetch:
+                await self.load_related(models)
+
+            return models
+
+        if mode == 'tuples':
+            return [tuple(rec) for rec in records]
+
+        if mode == 'scalars':
+            return [rec[0] for rec in records]
+
+        if not records:
+            return []
+
+        names = tuple(records[0].keys())
+        return [dict(zip(names, rec)) for rec in records]
+
+    def hydrate(self, records: t.Sequence[t.Mapping]) -> t.List[Model]:
+        """Build model instances from the given database records."""
+        if not records:
+            return []
+
+        if any(span[0] is not self._model for span in self._spans):
+            return self.hydrate_related(records)
+
+        names = tuple(records[0].keys())
+        session = get_session(self._db)
+        if session is None:
+            from_row = self._model._from_row
+            models = [from_row(rec, names) for rec in records]
+        else:
+            models = session.hydrate(self._model, records, names)
+
+        self.convert(self._model, models, names)
+
+        # Columns which are not the model's fields are set as plain attributes
+        # (slotted models keep their fields only)
+        meta = self._model.meta
+        extra = [(idx, name) for idx, name in enumerate(names) if name not in meta.fields]
+        if extra and not meta.slots:
+            for model, rec in zip(models, records):
+                data = model.__data__
+                for idx, name in extra:
+                    data.pop(name, None)
+                    model.__dict__[name] = rec[idx]
+
+        return models
+
+    def hydrate_related(self, records: t.Sequence[t.Mapping]) -> t.List[Model]:
+        """Build model instances with related models attached from joined records.
+
+        Every selected model is built from its own span of columns, related instances are
+        attached to the query model's ones (`None` when the columns are empty, e.g. for
+        LEFT JOIN). Columns out of the spans are set to the query model's instances.
+        """
+        model_cls = self._model
+        meta = model_cls.meta
+        spans = self._spans
+        related = [span for span in spans if span[0] is not model_cls]
+        relations = [meta.get_relation_name(rel_cls) for rel_cls, _, _ in related]
+        for name in relations:
+            model_cls._add_relation(name)
+
+        # The query model's columns: its span (if selected) and the columns out of the spans
+        keys = tuple(records[0].keys())
+        covered = {idx for _, start, end in spans for idx in range(start, end)}
+        positions = [
+            idx for span in spans if span[0] is model_cls for idx in range(span[1], span[2])]
+        positions += [idx for idx in range(len(keys)) if idx not in covered]
+        names = tuple(keys[idx] for idx in positions)
+        complete = any(span[0] is model_cls for span in spans)
+
+        from_row = model_cls._from_row
+        session = get_session(self._db)
+
+        models = []
+        rel_models: t.List[t.List[Model]] = [[] for _ in related]
+        for rec in records:
+            values = tuple(rec)
+            model = from_row([values[idx] for idx in positions], names)
+            if session is not None and complete:
+                model = session.add(model)
+
+            for idx, ((rel_cls, rel_start, rel_end), name) in enumerate(zip(related, relations)):
+                rel_values = values[rel_start:rel_end]
+                rel = None
+                if any(value is not None for value in rel_values):
+                    rel = rel_cls._from_row(rel_values, rel_cls.meta.field_names)
+                    if session is not None:
+                        rel = session.add(rel)
+                    rel_models[idx].append(rel)
+
+                model._relate(name, rel)
+
+            models.append(model)
+
+        self.convert(model_cls, models, names)
+        for (rel_cls, _, _), rels in zip(related, rel_models):
+            self.convert(rel_cls, rels, rel_cls.meta.field_names)
+
+        return models
+
+    @staticmethod
+    def convert(model_cls: t.Type[Model], models: t.Sequence[Model], names: t.Sequence[str]):
+        """Convert the models values loaded from the given columns with the fields converters.
+
+        Converters are collected once for the columns which need them and applied column-wise.
+        """
+        meta = model_cls.meta
+        python_converters = meta.python_converters
+        if not python_converters:
+            return
+
+        converters = [
+            (meta.field_index[name] if meta.slots else name, python_converters[name])
+            for name in names if name in python_converters
+        ]
+
+        slots = meta.slots
+        for key, converter in converters:
+            for model in models:
+                data = model.__data__
+                value = data[key] if slots else data.get(key)
+                if value is not None:
+                    data[key] = converter(value)
 
     def fetchval(self, *args, **kwargs) -> t.Awaitable:
-        assert self._db, 'DB is not initializated'
-        sql = self.get_sql()
-        return self._db.fetchval(sql, *args, **kwargs)
+        return self.run('fetchval', *args, **kwargs)
 
 
 class ModelBuilderMixin(ModelDBMixin):
 
     DB_TYPES: t.Dict[t.Type[Field], 'str'] = {}
 
+    # Max number of bind parameters per statement
+    MAX_PARAMS: int = 999
+    SUPPORTS_RETURNING: bool = False
+
+    # Run the query on the 'primary' database or on a 'replica' one (reads by default)
+    _route: t.Optional[str] = None
+
+    # Read results through the manager's results cache
+    _cached: bool = False
+    _cached_ttl: t.Optional[float] = None
+
+    # Inserted values before the conversion to the database types
+    _model_values: t.Optional[t.Dict[str, t.Any]] = None
+
+    _insert_table: t.Any
+    _update_table: t.Any
+    _delete_from: bool
+    _from: t.List[t.Any]
+    _joins: t.List[t.Any]
+    _selects: t.List[t.Any]
+    _for_update: bool
+
+    returning: t.Callable[..., t.Any]
+
     def __init__(self, model: t.Type[Model], **kwargs):
         self._model = model
         super().__init__(**kwargs)
@@ -75,14 +403,22 @@ class ModelBuilderMixin(ModelDBMixin):
         if not (terms or self._selects):
             terms = self._model,
 
-        prepared_terms = []
+        prepared_terms: t.List[t.Any] = []
+        spans = []
+        offset = len(self._selects)
         for term in terms:
             if isclass(term) and issubclass(term, Model):
-                prepared_terms += [f for f in term.meta.fields.values()]
+                start = offset + len(prepared_terms)
+                prepared_terms += term.meta.field_list
+                spans.append((term, start, offset + len(prepared_terms)))
             else:
                 prepared_terms.append(term)
 
-        return QueryBuilder.select(self, *prepared_terms)
+        query = QueryBuilder.select(self, *prepared_terms)
+        if spans:
+            query._spans = [*self._spans, *spans]
+
+        return query
 
     @builder
     def insert(self: QueryBuilder, *terms: t.Any, **values):
@@ -93,13 +429,323 @@ class ModelBuilderMixin(ModelDBMixin):
         if not values:
             return self
 
-        fields = self._model.meta.fields
-        values = {name: value for name, value in values.items() if name in fields}
-        columns, terms = zip(*values.items())
-        self._columns = [fields[name] for name in columns]
-        self._apply_terms(*terms)
+        meta = self._model.meta
+        fields, converters = meta.fields, meta.db_converters
+        columns: t.List[Field] = []
+        params: t.List[t.Any] = []
+        for name, value in values.items():
+            field = fields.get(name)
+            if field is not None:
+                converter = converters.get(name)
+                columns.append(field)
+                params.append(value if value is None or converter is None else converter(value))
+
+        if not columns:
+            raise ValueError(f"Unknown fields to insert into {self._model.__name__}: {values}")
+
+        self._model_values = {field.name: values[field.name] for field in columns}
+        self._columns = columns
+        self._apply_terms(*params)
         self._replace = False
 
+    async def insert_many(self, rows: t.Iterable[t.Union[Model, t.Mapping]], *,
+                          batch_size: int = 1000, copy: bool = False) -> t.List[Model]:
+        """Insert the given models or mappings with multi-rows statements.
+
+        Rows are grouped by their set of columns and split into batches which fit the dialect's
+        limit of parameters. Generated primary keys are set to the returned models (a dialect
+        takes them before the insert or matches them to the rows, see `insert_returning`).
+        With `copy=True` PostgreSQL (asyncpg) loads the rows with COPY which is faster, but
+        doesn't return generated primary keys.
+        """
+        assert self._db, 'DB is not initializated'
+        model_cls = self._model
+        meta = model_cls.meta
+
+        models = [
+            row if isinstance(row, Model) else model_cls(__with_defaults__=False, **{
+                name: value for name, value in row.items() if name in meta.fields
+            }) for row in rows
+        ]
+
+        groups: t.Dict[t.Tuple[str, ...], t.List[Model]] = {}
+        for model in models:
+            values = model._values()
+            columns = tuple(name for name in meta.field_names if name in values)
+            groups.setdefault(columns, []).append(model)
+
+        pk = meta.primary_key
+        for columns, group in groups.items():
+            rows_values = [tuple(getattr(model, name) for name in columns) for model in group]
+            for idx, name in enumerate(columns):
+                converter = meta.db_converters.get(name)
+                if converter:
+                    rows_values = [
+                        row if row[idx] is None else
+                        (*row[:idx], converter(row[idx]), *row[idx + 1:]) for row in rows_values]
+
+            if copy and backends.supports_copy(self._db):
+                await backends.copy_records(self._db, meta.table_name, columns, rows_values)
+                if self._results is not None:
+                    await self._results.invalidate([meta.table_name])
+                continue
+
+            fields = [meta.fields[name] for name in columns]
+            size = max(1, min(batch_size, self.MAX_PARAMS // (len(columns) + 1)))
+            for start in range(0, len(group), size):
+                batch = rows_values[start:start + size]
+                if pk in columns or not pk:
+                    await self.insert(*batch).columns(*fields).run('execute')
+                    continue
+
+                pks = await self.generate_keys(len(batch))
+                if pks is None:
+                    pks = await self.insert(*batch).columns(*fields).insert_returning(len(batch))
+
+                else:
+                    await self.insert(*(
+                        (value, *row) for value, row in zip(pks, batch)
+                    )).columns(meta.pk_field, *fields).run('execute')
+
+                if pks is not None:
+                    for model, value in zip(group[start:start + size], pks):
+                        setattr(model, pk, value)
+
+        return models
+
+    def values(self: QueryBuilder, *fields: t.Any) -> ModelQueryBuilder:
+        """Fetch rows as plain dicts."""
+        return self.fetch_as('dicts', fields)
+
+    def tuples(self: QueryBuilder, *fields: t.Any) -> ModelQueryBuilder:
+        """Fetch rows as plain tuples."""
+        return self.fetch_as('tuples', fields)
+
+    def scalars(self: QueryBuilder, field: t.Any = None) -> ModelQueryBuilder:
+        """Fetch a flat list of the first column values."""
+        return self.fetch_as('scalars', () if field is None else (field,))
+
+    def fetch_as(self: QueryBuilder, mode: str, fields: t.Sequence) -> ModelQueryBuilder:
+        """Replace the selection with the given fields (if any) and skip building models."""
+        query = copy(self)
+        if fields:
+            query._selects, query._spans = [], []
+
+        if not query._selects:
+            query = query.select(*fields)
+
+        query._fetch_mode = mode
+        return query
+
+    @builder
+    def route(self, target: str):
+        """Run the query on the 'primary' database or on a 'replica' one.
+
+        By default read queries are routed to replicas (when the manager has them).
+        """
+        assert target in ('primary', 'replica'), f"Unsupported target: {target}"
+        self._route = target
+
+    def get_db(self) -> Database:
+        router = self._router
+        if router is None or self._route == 'primary' or not (self._route or self.is_read()):
+            return super(ModelBuilderMixin, self).get_db()
+
+        return router.get_db()
+
+    def is_read(self) -> bool:
+        """Check the query only reads data."""
+        return bool(self._selects) and not (
+            self._insert_table or self._update_table or self._delete_from or self._for_update)
+
+    @builder
+    def cached(self, ttl: t.Optional[float] = None):
+        """Read the results through the manager's results cache.
+
+        The results are kept for the given time (seconds) or until the query's tables are
+        changed by insert/update/delete queries of the same manager.
+        """
+        self._cached = True
+        self._cached_ttl = ttl
+
+    async def run(self, method: str, *args, **kwargs) -> t.Any:
+        results = self._results
+        if results is None:
+            return await super(ModelBuilderMixin, self).run(method, *args, **kwargs)
+
+        if self._insert_table or self._update_table or self._delete_from:
+            res = await super(ModelBuilderMixin, self).run(method, *args, **kwargs)
+            await results.invalidate(self.get_tables())
+            return res
+
+        # Results which are read inside a transaction may be rolled back
+        db = self._db
+        if not self._cached or args or kwargs or (db is not None and backends.in_transaction(db)):
+            return await super(ModelBuilderMixin, self).run(method, *args, **kwargs)
+
+        sql, params = self.compile()
+        key = f"{method}:{sql}:{params!r}"
+        res = await results.get(key, MISSING)
+        if res is MISSING:
+            if self._hooks is not None:
+                res = await self._hooks.run(self, method, compiled=(sql, params))
+            else:
+                res = await self.run_sql(self.get_db(), method, sql, params)
+            await results.set(key, res, ttl=self._cached_ttl, tables=self.get_tables())
+
+        return res
+
+    def get_tables(self) -> t.Set[str]:
+        """Get names of the tables which are used by the query."""
+        names = set()
+        for table in (self._insert_table, self._update_table, *self._from,
+                      *[join.item for join in self._joins]):
+            if isclass(table) and issubclass(table, Model):
+                names.add(table.meta.table_name)
+            elif isinstance(table, Table):
+                names.add(table._table_name)
+
+        return names
+
+    @builder
+    def prefetch(self, *fields: t.Union[str, ForeignKey]):
+        """Load related models for the results with one query per relation (chunked).
+
+        A foreign key of the query's model attaches the referenced instance (`user.role`), a
+        foreign key of another model to the query's model attaches lists of the referencing
+        instances (`role.users`).
+        """
+        meta = self._model.meta
+        self._prefetch = (*self._prefetch, *[
+            meta.foreign_keys[field] if isinstance(field, str) else field for field in fields])
+
+    async def load_related(self, models: t.Sequence[Model]):
+        """Attach related models for the prefetched foreign keys."""
+        if not models:
+            return
+
+        for field in self._prefetch:
+            if field.model is self._model:
+                rel_field, key_field, many = field.rel_field, field, False
+                name = field.relation_name
+
+            elif field.rel_field.model is self._model:
+                rel_field, key_field, many = field, field.rel_field, True
+                name = field.related_name
+
+            else:
+                raise ValueError(f"{field.model.__name__}.{field.name} is not related "
+                                 f"to {self._model.__name__}")
+
+            keys = list({getattr(model, key_field.name) for model in models} - {None})
+            query = self.builder_for(rel_field.model).select()
+            related: t.Dict[t.Any, t.Any] = {}
+            for start in range(0, len(keys), self.MAX_PARAMS):
+                chunk = keys[start:start + self.MAX_PARAMS]
+                for rel in await query.where(rel_field.isin(chunk)).fetchall():
+                    key = getattr(rel, rel_field.name)
+                    if many:
+                        related.setdefault(key, []).append(rel)
+                    else:
+                        related[key] = rel
+
+            self._model._add_relation(name)
+            for model in models:
+                rel = related.get(getattr(model, key_field.name))
+                model._relate(name, [] if many and rel is None else rel)
+
+    async def get(self, pk: t.Any) -> t.Optional[Model]:
+        """Get a model by the primary key.
+
+        A model which is already loaded in the current session is returned without a query.
+        """
+        session = get_session(self._db)
+        if session is not None:
+            model = session.get(self._model, pk)
+            if model is not None:
+                return model
+
+        meta = self._model.meta
+        return await self.select().where(meta.pk_field == pk).fetchone()
+
+    def builder_for(self, model: t.Type[Model]) -> t.Any:
+        """Create a query builder for the given model with the same database."""
+        kwargs = {'dialect': self.dialect} if type(self) is ModelQueryBuilder else {}
+        return type(self)(
+            model, db=self._db, cache=self._cache, results=self._results, router=self._router,
+            hooks=self._hooks, **kwargs)
+
+    async def update_many(self, models: t.Sequence[Model], fields: t.Sequence[t.Union[str, Field]],
+                          *, batch_size: int = 1000) -> int:
+        """Update the given fields of the models with a CASE based statement per batch."""
+        assert self._db, 'DB is not initializated'
+        meta = self._model.meta
+        pk_field = meta.pk_field
+        names = [field if isinstance(field, str) else field.name for field in fields]
+        names = [name for name in names if name != meta.primary_key]
+        if not (models and names):
+            return 0
+
+        assert all(model._pk is not None for model in models), 'Primary keys are required'
+        size = max(1, min(batch_size, self.MAX_PARAMS // (2 * len(names) + 1)))
+        for start in range(0, len(models), size):
+            batch = models[start:start + size]
+            query = self.update()
+            for name in names:
+                field = meta.fields[name]
+                case = Case()
+                for model in batch:
+                    case = case.when(pk_field == model._pk, self.param(field, getattr(model, name)))
+                query = query.set(field, case)
+
+            await query.where(pk_field.isin([model._pk for model in batch])).run('execute')
+
+        return len(models)
+
+    def param(self, field: Field, value: t.Any) -> Term:
+        """Wrap the value for the given field as a bind parameter."""
+        return Value(value if value is None else field.to_db(value))
+
+    async def generate_keys(self, count: int) -> t.Optional[t.Sequence]:
+        """Get primary keys for the rows to insert (when a dialect generates them beforehand)."""
+        return None
+
+    async def insert_returning(self, count: int) -> t.Optional[t.Sequence]:
+        """Execute the insert query and return generated primary keys in the rows order.
+
+        The order of RETURNING rows is not guaranteed, so multi-rows inserts are run row by
+        row unless a dialect knows the keys order. None is returned when the keys are unknown.
+        """
+        if count > 1:
+            return await self.insert_rows_returning()
+
+        if self.SUPPORTS_RETURNING:
+            rec = await self.returning(self._model.meta.pk_field).run('fetchone')
+            return [rec[0]]
+
+        await self.run('execute')
+        return None
+
+    async def insert_rows_returning(self: QueryBuilder) -> t.List:
+        """Run the insert query row by row and return generated primary keys."""
+        pks = []
+        for row in self._values:
+            query = copy(self)
+            query._values = [row]
+            res = await query.insert_returning(1)
+            pks.append(None if res is None else res[0])
+
+        return pks
+
+    @staticmethod
+    def wrap_constant(val, wrapper_cls: t.Optional[t.Type[Term]] = None) -> Term:
+        return QueryBuilder.wrap_constant(val, wrapper_cls or Value)
+
+    def set(self: QueryBuilder, field: t.Any, value: t.Any) -> ModelQueryBuilder:
+        if isinstance(field, Field) and not (value is None or isinstance(value, Term)):
+            value = field.to_db(value)
+        return QueryBuilder.set(self, field, self.wrap_constant(value))
+
     @builder
     def update(self):
         if self._update_table is not None or self._selects or self._delete_from:
@@ -108,21 +754,44 @@ class ModelBuilderMixin(ModelDBMixin):
         self._from = []
         self._update_table = self._model
 
-    def join(self, item: t.Any, **kwargs):
+    def join(self, item: t.Any, *args, **kwargs):
         if isclass(item) and issubclass(item, Model):
             item = item.meta.table
 
-        return QueryBuilder.join(self, item, **kwargs)
+        return QueryBuilder.join(self, item, *args, **kwargs)
 
-    async def execute(self: QueryBuilder, *args, **kwargs) -> t.Awaitable:
-        assert self._db, 'DB is not initializated'
-        sql = self.get_sql()
-        res = await self._db.execute(sql, *args, **kwargs)
-        if self._insert_table:
-            params = builder_params(self)
-            return self._model(__with_defaults__=False, **dict(params, id=res))
+    async def execute(self: QueryBuilder, *args, **kwargs) -> t.Any:
+        if not self._insert_table:
+            return await self.run('execute', *args, **kwargs)
 
-        return res
+        meta = self._model.meta
+        primary_key = meta.primary_key
+        values = self._model_values
+        model = self._model(
+            __with_defaults__=False, **(builder_params(self) if values is None else values))
+
+        # Only models with all the fields returned are stored in the session
+        complete = False
+
+        # Get the primary key (or the columns requested with `returning`) from the insert
+        if self.SUPPORTS_RETURNING and (primary_key or self._returns) and not (args or kwargs):
+            query = self if self._returns else self.returning(meta.pk_field)
+            rec = await query.run('fetchone')
+            if rec:
+                complete = set(meta.field_names).issubset(rec.keys())
+                for name, value in rec.items():
+                    field = meta.fields.get(name)
+                    if field is not None:
+                        setattr(model, name, value if value is None else field.to_python(value))
+
+        else:
+            res = await self.run('execute', *args, **kwargs)
+            if primary_key and getattr(model, primary_key) is None:
+                setattr(model, primary_key, res)
+
+        model._clean()
+        session = get_session(self._db)
+        return model if session is None or not complete else session.add(model)
 
     def __await__(self):
         return self.execute().__await__()
@@ -135,11 +804,7 @@ class ModelBuilderMixin(ModelDBMixin):
     def create_table(self: QueryBuilder) -> ModelCreateQueryBuilder:
         meta = self._model.meta
         builder = self.QUERY_CLS.create_table(meta.table, db=self._db, dialect=self.dialect)
-        columns = {field.name: Column(
-            field.name, column_type=self.DB_TYPES.get(type(field), field.db_type),
-            default=field.default if not callable(field.default) else None, nullable=field.null,
-        ) for field in meta.fields.values()}
-
+        columns = meta.get_columns(self.dialect, self.DB_TYPES)
         builder = builder.columns(*columns.values())
 
         if meta.primary_key:
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import typing as t
+from itertools import cycle
+
+from aio_databases import Database
+
+from .backends import PoolMonitor, in_transaction
+
+
+POLICIES = 'round-robin', 'least-busy'
+
+
+class Router:
+    """Route read queries to replica databases.
+
+    Replicas are chosen in turn (round-robin) or by the least number of connections in use
+    (least-busy). Queries inside a transaction of the primary database stay on it.
+    """
+
+    def __init__(self, primary: Database, replicas: t.Sequence[Database],
+                 policy: str = 'round-robin', monitors: t.Sequence[PoolMonitor] = ()):
+        assert policy in POLICIES, f"Unsupported policy: {policy}"
+        self.primary = primary
+        self.replicas = replicas
+        self.policy = policy
+        self.monitors = {id(monitor.db): monitor for monitor in monitors}
+        self._cycle = cycle(replicas)
+
+    def __repr__(self) -> str:
+        return f"<Router {self.policy} replicas={len(self.replicas)}>"
+
+    def get_db(self) -> Database:
+        """Get a database for a read query."""
+        if not self.replicas or in_transaction(self.primary):
+            return self.primary
+
+        if self.policy == 'least-busy':
+            return min(self.replicas, key=self.get_load)
+
+        return next(self._cycle)
+
+    def get_load(self, db: Database) -> int:
+        """Get a number of the database's connections in use."""
+        monitor = self.monitors.get(id(db))
+        if monitor is None:
+            return 0
+        return monitor.acquired - monitor.released
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import typing as t
+from contextvars import ContextVar
+
+from aio_databases import Database
+
+
+if t.TYPE_CHECKING:
+    from .model import Model
+
+
+current_session: ContextVar[t.Optional[Session]] = ContextVar('session', default=None)
+
+
+class Session:
+    """Identity map of the models which have been loaded within a scope.
+
+    Models are keyed by their class and primary key, so a row fetched several times (joins,
+    prefetches, repeated lookups) is hydrated into the same instance. Loaded instances are
+    not refreshed from later fetches.
+    """
+
+    def __init__(self, db: t.Optional[Database] = None):
+        self.db = db
+        self.identities: t.Dict[t.Tuple[t.Type[Model], t.Any], Model] = {}
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    def __repr__(self) -> str:
+        return f"<Session models={len(self.identities)}>"
+
+    def get(self, model_cls: t.Type[Model], pk: t.Any) -> t.Optional[Model]:
+        """Get a loaded model by the primary key."""
+        return self.identities.get((model_cls, pk))
+
+    def add(self, model: Model) -> Model:
+        """Store the model and return the instance which is kept by the session."""
+        pk = model._pk
+        if pk is None:
+            return model
+
+        return self.identities.setdefault((type(model), pk), model)
+
+    def hydrate(self, model_cls: t.Type[Model], records: t.Sequence[t.Mapping],
+                names: t.Sequence[str]) -> t.List[Model]:
+        """Build models from the records reusing the loaded ones.
+
+        Partial records (without all the model's fields) are not stored.
+        """
+        meta = model_cls.meta
+        from_row = model_cls._from_row
+        if names == meta.field_names and meta.pk_index is not None:
+            idx = meta.pk_index
+        elif meta.primary_key and set(meta.field_names).issubset(names):
+            idx = names.index(meta.primary_key)
+        else:
+            return [from_row(rec, names) for rec in records]
+
+        identities = self.identities
+        models = []
+        for rec in records:
+            key = model_cls, rec[idx]
+            model = identities.get(key)
+            if model is None:
+                model = identities[key] = from_row(rec, names)
+
+            models.append(model)
+
+        return models
+
+    def clear(self):
+        """Forget the loaded models."""
+        self.identities.clear()
+
+
+def get_session(db: t.Optional[Database]) -> t.Optional[Session]:
+    """Get the current session for the given database."""
+    session = current_session.get()
+    if session is None or session.db is not db:
+        return None
+
+    return session
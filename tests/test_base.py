@@ -62,6 +62,9 @@ def test_insert(manager, User):
     qs = qb.insert(name='test', is_active=False, unknown='ignore')
     assert str(qs) == 'INSERT INTO "user" ("name","is_active") VALUES (\'test\',false)'
 
+    with pytest.raises(ValueError):
+        qb.insert(unknown='ignore')
+
 
 def test_update(manager, User):
     qb = manager(User)
@@ -97,3 +100,167 @@ def test_schema(manager, User):
 
     qs = qb.drop_table().if_exists()
     assert qs.get_sql() == 'DROP TABLE IF EXISTS "user"'
+
+
+def test_compile(User):
+    from pypika_orm import Manager
+
+    qs = Manager(dialect='sqlite')(User).select().where(User.id == 1).where(
+        User.name.isin(['a', 'b']))
+    assert qs.compile() == (
+        'SELECT "id","name","created","is_active","role_id" FROM "user" '
+        'WHERE "id"=? AND "name" IN (?,?)', (1, 'a', 'b'))
+
+    qs = Manager(dialect='postgresql')(User).update().set(User.name, 'jim').where(User.id == 1)
+    assert qs.compile() == ('UPDATE "user" SET "name"=$1 WHERE "user"."id"=$2', ('jim', 1))
+
+    qs = Manager(dialect='mysql')(User).insert(name='jim', is_active=False)
+    assert qs.compile() == (
+        'INSERT INTO `user` (`name`,`is_active`) VALUES (%s,%s)', ('jim', False))
+
+
+def test_pool_options():
+    from aio_databases import Database
+
+    from pypika_orm import Manager
+
+    manager = Manager(
+        'postgresql://localhost/tests', pool_size=20, pool_min_size=2, pool_recycle=300)
+    assert manager.db.backend.options == {
+        'max_size': 20, 'min_size': 2, 'max_inactive_connection_lifetime': 300,
+        'statement_cache_size': 128}
+
+    manager = Manager('sqlite:///:memory:', pool_size=20)
+    assert manager.db.backend.options == {}
+    assert manager.pool_stats()['in_use'] == 0
+
+    # Given databases keep their options and share the monitor
+    db = Database('postgresql://localhost/tests', max_size=5)
+    manager1 = Manager(db, pool_timeout=5)
+    manager2 = Manager(db, pool_size=20, pool_timeout=0.001)
+    assert db.backend.options == {'max_size': 5}
+    assert manager1.pool is manager2.pool
+    assert manager2.pool.timeout is None
+    assert db.backend.acquire == manager1.pool.acquire
+    assert manager1.pool._acquire.__self__ is db.backend
+
+
+async def test_pool_timeout(aiosleep):
+    from asyncio import TimeoutError
+
+    from pypika_orm import Manager, backends
+
+    manager = Manager('sqlite:///:memory:', pool_timeout=0.01)
+    monitor = manager.pool
+    assert not backends.supports_concurrency(manager.db)
+
+    async def acquire():
+        await aiosleep(1)
+
+    monitor._acquire = acquire
+    with pytest.raises(TimeoutError):
+        await monitor.acquire()
+
+    assert monitor.timeouts == 1
+
+
+def test_replicas(User):
+    from pypika_orm import Manager
+
+    manager = Manager('sqlite:///:memory:', replicas=['sqlite:///:memory:', 'sqlite:///:memory:'])
+    primary, (replica1, replica2) = manager.db, manager.replicas
+
+    qs = manager(User).select()
+    assert [qs.get_db() for _ in range(3)] == [replica1, replica2, replica1]
+    assert qs.route('primary').get_db() is primary
+    assert qs.where(User.id == 1).for_update().get_db() is primary
+    assert manager(User).insert(name='jim').get_db() is primary
+    assert manager(User).update().set(User.name, 'jim').get_db() is primary
+    assert manager(User).delete().get_db() is primary
+
+
+def test_delete_using(User, Role):
+    from pypika_orm import Manager
+
+    qs = Manager(dialect='postgresql')(User).delete().using(Role.meta.table).where(
+        User.role_id == Role.id)
+    assert qs.get_sql() == (
+        'DELETE FROM "user" USING "role" WHERE "user"."role_id"="role"."id"')
+
+    manager = Manager(
+        'sqlite:///:memory:', replicas=['sqlite:///:memory:'] * 2, replicas_policy='least-busy')
+    manager.router.monitors[id(manager.replicas[0])].acquired = 1
+    assert manager(User).select().get_db() is manager.replicas[1]
+    assert len(manager.pool_stats()['replicas']) == 2
+
+
+def test_upsert(User):
+    from pypika_orm import Manager
+
+    qs = Manager(dialect='postgresql')(User).insert(id=1, name='jim')
+    assert qs.on_conflict(User.id).do_update(User.name).compile() == (
+        'INSERT INTO "user" ("id","name") VALUES ($1,$2) '
+        'ON CONFLICT ("id") DO UPDATE SET "name"=EXCLUDED."name"', (1, 'jim'))
+
+    qs = Manager(dialect='sqlite')(User).insert(id=1, name='jim')
+    assert qs.on_conflict(User.id).do_nothing().compile() == (
+        'INSERT INTO "user" ("id","name") VALUES (?,?) ON CONFLICT ("id") DO NOTHING', (1, 'jim'))
+
+    qs = Manager(dialect='mysql')(User).insert(id=1, name='jim')
+    assert qs.on_conflict(User.id).do_update(User.name).compile() == (
+        'INSERT INTO `user` (`id`,`name`) VALUES (%s,%s) '
+        'ON DUPLICATE KEY UPDATE `name`=VALUES(`name`)', (1, 'jim'))
+    assert qs.on_conflict().do_nothing().compile() == (
+        'INSERT IGNORE INTO `user` (`id`,`name`) VALUES (%s,%s)', (1, 'jim'))
+
+
+def test_query_cache(User):
+    from pypika_orm import Manager
+
+    manager = Manager(dialect='postgresql', cache_size=2)
+    cache = manager.cache
+    assert cache is not None
+
+    for pk in range(3):
+        qs = manager(User).update().set(User.name, f"user{pk}").where(User.id == pk)
+        assert qs.compile() == (
+            'UPDATE "user" SET "name"=$1 WHERE "user"."id"=$2', (f"user{pk}", pk))
+
+    assert cache.stats() == {'size': 2, 'length': 1, 'hits': 2, 'misses': 1, 'evictions': 0}
+
+    assert manager(User).select().where(User.id == 1).compile()[0] == (
+        'SELECT "id","name","created","is_active","role_id" FROM "user" WHERE "id"=$1')
+    assert manager(User).select().where(User.name == 'jim').compile()[0] == (
+        'SELECT "id","name","created","is_active","role_id" FROM "user" WHERE "name"=$1')
+    assert cache.misses == 3
+    assert cache.evictions == 1
+
+    assert Manager(cache_size=0).cache is None
+
+
+@pytest.mark.parametrize('aiolib', ['trio'])
+async def test_memory_result_cache(aiolib):
+    from pypika_orm.cache import MemoryResultCache
+
+    cache = MemoryResultCache(size=2)
+    await cache.set('a', 1, tables=['user'])
+    await cache.set('b', 2, tables=['user', 'role'])
+    await cache.set('c', 3, ttl=-1)
+    assert len(cache) == 2
+    assert await cache.get('a') is None
+    assert await cache.get('c', 'missing') == 'missing'
+    assert await cache.get('b') == 2
+
+    await cache.invalidate(['role'])
+    assert await cache.get('b') is None
+    assert len(cache) == 0
+
+
+def test_columns():
+    from pypika_orm.columns import Columns
+
+    columns = Columns(('id', 'value'), (int, int))
+    columns.extend([(1, 2 ** 63), (2, None)])
+    data = columns.result()
+    assert list(data['id']) == [1, 2]
+    assert list(data['value']) == [2 ** 63, None]
@@ -57,6 +57,22 @@ def test_models(User, Role):
     assert isinstance(user.created, dt.datetime)
 
 
+def test_meta(User, Role):
+    meta = User.meta
+    assert meta.field_names == ('id', 'name', 'created', 'is_active', 'role_id')
+    assert meta.field_list == (User.id, User.name, User.created, User.is_active, User.role_id)
+    assert meta.pk_index == 0
+    assert meta.static_defaults == ((3, 'is_active', True),)
+    assert meta.callable_defaults == ((2, 'created', dt.datetime.utcnow),)
+    assert set(meta.python_converters) == {'created', 'is_active'}
+    assert meta.db_converters == {}
+
+    columns = meta.get_columns(None, {})
+    assert list(columns) == list(meta.field_names)
+    assert meta.get_columns(None, {}) is columns
+    assert meta.get_columns('postgresql', {}) is not columns
+
+
 def test_inheritance():
     from pypika_orm import Model, fields
 
@@ -74,3 +90,129 @@ def test_inheritance():
 
     created = Test.meta.fields['created']
     assert str(created.table) == '"test"'
+    assert created is not TimeModel.meta.fields['created']
+    assert created.default is TimeModel.created.default
+    assert TimeModel.created.model is TimeModel
+    assert str(TimeModel.created.table) == '"timemodel"'
+    assert Test.meta.setup_time > 0
+
+    class Admin(Test):
+        role = fields.Varchar()
+
+    assert Admin.meta.field_names == ('created', 'id', 'name', 'role')
+    assert Admin.name.get_sql(with_namespace=True, quote_char='"') == '"admin"."name"'
+    assert Test.name.get_sql(with_namespace=True, quote_char='"') == '"test"."name"'
+
+
+def test_from_row(User):
+    user = User._from_row((1, 'jim', None), ('id', 'name', 'created'))
+    assert user.id == 1
+    assert user.name == 'jim'
+    assert user.created is None
+    assert user.is_active is None
+    assert not user.__dirty__
+
+    user.name = 'tom'
+    assert user.__dirty__ == {'name'}
+
+
+def test_slots():
+    from pypika_orm import Model, fields
+
+    class Item(Model):
+        id = fields.Auto()
+        name = fields.Varchar()
+        price = fields.Integer(default=0)
+
+        class Meta:
+            slots = True
+
+    assert Item.meta.slots
+    assert not hasattr(Item(), '__dict__')
+    assert isinstance(Item.name, fields.Field)
+
+    item = Item(name='test')
+    assert item.id is None
+    assert item.name == 'test'
+    assert item.price == 0
+    assert item.__dirty__ == 0b010
+    assert item._values() == {'name': 'test', 'price': 0}
+
+    item.id = None
+    assert item._values() == {'id': None, 'name': 'test', 'price': 0}
+
+    item = Item._from_row((1, 'test', 10), ('id', 'name', 'price'))
+    assert item.id == 1
+    assert item.price == 10
+    assert item.__dirty__ == 0
+    assert item._changes() == {}
+
+    item.price = 20
+    assert item._changes() == {'price': 20}
+    item._clean()
+    assert item._changes() == {}
+
+    item = Item._from_row(('test', 42), ('name', 'unknown'))
+    assert item.name == 'test'
+    assert item.id is None
+
+    class SubItem(Item):
+        count = fields.Integer()
+
+    assert not hasattr(SubItem(), '__dict__')
+    assert SubItem(count=2).count == 2
+
+
+def test_lazy_defaults():
+    from pypika_orm import Model, fields
+
+    calls = []
+
+    def counter():
+        calls.append(1)
+        return len(calls)
+
+    class Item(Model):
+        id = fields.Auto()
+        num = fields.Integer(default=counter)
+        price = fields.Integer(default=0)
+
+    class SlottedItem(Item):
+
+        class Meta:
+            slots = True
+
+    for model in (Item, SlottedItem):
+        calls.clear()
+        items = [model() for _ in range(3)]
+        assert not calls
+
+        assert items[0].num == 1
+        assert items[0].num == 1
+        assert items[1]._values() == {'num': 2, 'price': 0}
+        assert items[2]._changes() == {}
+        assert model(num=42).num == 42
+        assert len(calls) == 2
+
+        assert model(__with_defaults__=False).num is None
+        assert model._from_row((1,), ('id',)).num is None
+        assert len(calls) == 2
+
+
+def test_converters():
+    import datetime as dt
+    import uuid
+    from decimal import Decimal
+    from pypika_orm import fields
+
+    assert fields.Varchar().python_converter is None
+    assert fields.Integer().db_converter is None
+    assert fields.Bool().python_converter(1) is True
+    assert fields.Datetime().to_python('2021-01-02 03:04:05') == dt.datetime(2021, 1, 2, 3, 4, 5)
+    assert fields.Date().to_python('2021-01-02') == dt.date(2021, 1, 2)
+    assert fields.Decimal().to_python(1.5) == Decimal('1.5')
+
+    value = uuid.uuid4()
+    assert fields.UUIDB().to_db(value) == value.bytes
+    assert fields.UUIDB().to_python(value.bytes) == value
+    assert fields.UUID().to_db(value) == str(value)
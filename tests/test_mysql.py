@@ -1,6 +1,12 @@
 import pytest
 
 
+@pytest.fixture(scope='module')
+def aiolib():
+    """Aiomysql and the concurrent queries (`Manager.gather`) work with asyncio only."""
+    return 'asyncio'
+
+
 @pytest.fixture(scope='module')
 async def db_url():
     return 'mysql://root@127.0.0.1:3306/tests'
@@ -62,3 +68,11 @@ async def test_db(manager, User, Role):
     assert isinstance(role, Role)
     assert role.id == 1
     assert role.name == 'user'
+
+    # Queries between the streamed batches
+    names = []
+    async for role in manager(Role).select().orderby(Role.id).iterate(batch_size=1):
+        names.append(role.name)
+        assert await manager(Role).select().where(Role.id == role.id).fetchone()
+
+    assert names == ['user', 'admin']
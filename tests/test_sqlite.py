@@ -1,4 +1,13 @@
 import pytest
+from pypika import functions as fn
+
+from pypika_orm.backends import aclosing
+
+
+@pytest.fixture(scope='module')
+def aiolib():
+    """Aiosqlite and the concurrent queries (`Manager.gather`) work with asyncio only."""
+    return 'asyncio'
 
 
 @pytest.fixture(scope='module')
@@ -46,11 +55,17 @@ async def test_insert(manager, User, Role):
     assert isinstance(user, User)
     assert user.id == 1
     assert user.name == 'jim'
+    assert not user._changes()
+
+    # Get the whole row (with server defaults) back
+    user = await manager(User).insert(name='tom').returning('*')
+    assert user.id == 2
+    assert user.is_active
 
 
 async def test_save(manager, Role):
     role = Role(name='user')
-    role = await manager.save(role)
+    assert await manager.save(role) is role
     assert role
     assert role.id == 1
     assert role.name == 'user'
@@ -58,8 +73,26 @@ async def test_save(manager, Role):
     role2 = await manager(Role).select().fetchone()
     assert role == role2
 
-    #  role.name = 'guest'
-    #  role = await manager.save(role)
+    assert not role._changes()
+    role.name = 'guest'
+    assert role._changes() == {'name': 'guest'}
+    role = await manager.save(role)
+    assert role.id == 1
+    assert not role._changes()
+
+    role2 = await manager(Role).select().fetchone()
+    assert role2.name == 'guest'
+
+    # Nothing to update
+    assert await manager.save(role2) is role2
+
+    # Save the same model again
+    role = Role(name='staff')
+    await manager.save(role)
+    role.name = 'admin'
+    await manager.save(role)
+    assert [role.name for role in await manager(Role).select().orderby(Role.id).fetchall()] == [
+        'guest', 'admin']
 
 
 async def test_db(manager, User, Role):
@@ -75,6 +108,7 @@ async def test_db(manager, User, Role):
     assert isinstance(role1, Role)
     assert role1.id == 1
     assert role1.name == 'user'
+    assert not role1.__dirty__
     assert role2.id == 2
     assert role2.name == 'admin'
 
@@ -83,6 +117,11 @@ async def test_db(manager, User, Role):
     assert role.id == 1
     assert role.name == 'user'
 
+    [role] = await manager(Role).select(Role.name, Role.id.as_('pk')).where(Role.id == 2).fetchall()
+    assert role.name == 'admin'
+    assert role.pk == 2
+    assert role.id is None
+
     await manager(User).insert(name='jim', role_id=role1.id)
     [user] = await manager(User).select().fetchall()
     assert user.id == 1
@@ -95,3 +134,454 @@ async def test_db(manager, User, Role):
     [rec] = await manager.fetchall(qs)
     assert rec
     assert list(rec) == [1, 'jim', None, 1, 1, 1, 'user', None]
+
+    [user] = await qs.fetchall()
+    assert isinstance(user, User)
+    assert user.name == 'jim'
+    assert isinstance(user.role, Role)
+    assert user.role.id == 1
+    assert user.role.name == 'user'
+
+    await manager(User).insert(name='tom')
+    qs = manager(User).select(User, Role).left_join(Role).on(
+        User.role_id == Role.id).orderby(User.id)
+    [jim, tom] = await qs.fetchall()
+    assert jim.role.name == 'user'
+    assert tom.name == 'tom'
+    assert tom.role is None
+
+    # The query's model is the root even when its columns are selected separately
+    [jim, tom] = await manager(User).select(User.name, Role).left_join(Role).on(
+        User.role_id == Role.id).orderby(User.id).fetchall()
+    assert isinstance(jim, User)
+    assert jim.name == 'jim'
+    assert jim.id is None
+    assert jim.role.name == 'user'
+    assert tom.role is None
+
+    # Relations are explicit attributes
+    with pytest.raises(AttributeError):
+        jim.unknown
+
+    with pytest.raises(AttributeError):
+        User(name='bob').role
+
+
+async def test_iterate(manager, Role):
+    for idx in range(5):
+        await manager(Role).insert(name=f"role{idx}")
+
+    qs = manager(Role).select().orderby(Role.id)
+    chunks = [chunk async for chunk in qs.chunks(batch_size=2)]
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert isinstance(chunks[0][0], Role)
+
+    names = [role.name async for role in qs.where(Role.id > 1).iterate(batch_size=2)]
+    assert names == ['role1', 'role2', 'role3', 'role4']
+
+    async with aclosing(qs.iterate(batch_size=2)) as roles:
+        async for role in roles:
+            break
+
+    with pytest.raises(StopAsyncIteration):
+        await roles.__anext__()
+
+    assert len(await qs.fetchall()) == 5
+
+
+async def test_iterate_dedicated(Role, tmp_path, monkeypatch):
+    from pypika_orm import Manager, backends
+
+    # Stream as with MySQL which cursors block their connections
+    monkeypatch.setattr(backends, 'BLOCKING_CURSORS', {'aiosqlite'})
+    monkeypatch.chdir(tmp_path)
+
+    # A file database is shared by the connections
+    async with Manager('sqlite://db.sqlite') as manager:
+        await manager(Role).create_table()
+        await manager(Role).insert_many([{'name': f"role{idx}"} for idx in range(5)])
+
+        qs = manager(Role).select().orderby(Role.id)
+        names = []
+        async for role in qs.iterate(batch_size=2):
+            names.append(role.name)
+            assert await manager(Role).select().where(Role.id == role.id).fetchone()
+
+        assert names == [f"role{idx}" for idx in range(5)]
+        assert manager.pool_stats()['in_use'] == 1
+
+        async with manager.transaction():
+            await manager(Role).insert(name='role5')
+            assert len([role async for role in qs.iterate(batch_size=2)]) == 6
+
+
+async def test_insert_many(manager, Role, User):
+    roles = await manager(Role).insert_many([
+        {'name': 'user'}, {'id': 10, 'name': 'guest'}, {'name': 'admin'}, {'name': 'staff'},
+    ], batch_size=2)
+    assert [(role.id, role.name) for role in roles] == [
+        (1, 'user'), (10, 'guest'), (2, 'admin'), (3, 'staff')]
+    assert isinstance(roles[0], Role)
+
+    users = await manager(User).insert_many(
+        User(name=f"user{idx}", role_id=1) for idx in range(1500))
+    assert [user.id for user in users] == list(range(1, 1501))
+    assert await manager(User).select(fn.Count(User.id)).fetchval() == 1500
+
+
+async def test_insert_many_rows(manager):
+    from pypika_orm import Manager, Model, fields
+
+    class Tag(Model):
+        id = fields.Integer()
+        name = fields.Varchar()
+
+    await manager(Tag).create_table().if_not_exists()
+
+    # The keys of not auto primary keys are not matched to the rows by order
+    manager = Manager(manager.db)
+    events = []
+    manager.instrument(before=lambda event: events.append(event.sql))
+    tags = await manager(Tag).insert_many([{'name': 'a'}, {'name': 'b'}, {'name': 'c'}])
+    assert [(tag.id, tag.name) for tag in tags] == [(1, 'a'), (2, 'b'), (3, 'c')]
+    assert len(events) == 3
+
+
+async def test_bulk_update(manager, Role):
+    roles = await manager(Role).insert_many([{'name': f"role{idx}"} for idx in range(5)])
+    for role in roles:
+        role.name = role.name.upper()
+
+    assert await manager.bulk_update(roles, ['name'], batch_size=2) == 5
+    names = await manager(Role).select(Role.name).orderby(Role.id).fetchall()
+    assert [role.name for role in names] == ['ROLE0', 'ROLE1', 'ROLE2', 'ROLE3', 'ROLE4']
+
+    await manager(Role).insert(id=1, name='user').on_conflict(Role.id).do_update(Role.name)
+    await manager(Role).insert(id=2, name='guest').on_conflict(Role.id).do_nothing()
+    names = await manager(Role).select(Role.name).orderby(Role.id).limit(2).fetchall()
+    assert [role.name for role in names] == ['user', 'ROLE1']
+
+
+async def test_prefetch(manager, Role, User):
+    roles = await manager(Role).insert_many(
+        [{'name': 'user'}, {'name': 'admin'}, {'name': 'guest'}])
+    await manager(User).insert_many([
+        {'name': 'jim', 'role_id': roles[0].id},
+        {'name': 'tom', 'role_id': roles[1].id},
+        {'name': 'bob', 'role_id': roles[0].id},
+        {'name': 'ann'},
+    ])
+
+    users = await manager(User).select().orderby(User.id).prefetch(User.role_id).fetchall()
+    assert [user.role and user.role.name for user in users] == ['user', 'admin', 'user', None]
+    assert users[0].role is users[2].role
+
+    roles = await manager(Role).select().orderby(Role.id).prefetch(User.role_id).fetchall()
+    assert [[user.name for user in role.users] for role in roles] == [['jim', 'bob'], ['tom'], []]
+
+    user = await manager(User).select().where(User.name == 'tom').prefetch('role_id').fetchone()
+    assert user.role.name == 'admin'
+
+
+async def test_session(manager, Role, User):
+    role = await manager(Role).insert(name='user')
+    await manager(User).insert(name='jim', role_id=role.id)
+
+    role1 = await manager(Role).get(role.id)
+    role2 = await manager(Role).get(role.id)
+    assert role1 == role2
+    assert role1 is not role2
+
+    async with manager.session() as session:
+        role1 = await manager(Role).get(role.id)
+        assert len(session) == 1
+        assert await manager(Role).get(role.id) is role1
+
+        [role2] = await manager(Role).select().fetchall()
+        assert role2 is role1
+
+        [user] = await manager(User).select().prefetch(User.role_id).fetchall()
+        assert user.role is role1
+
+        [user2] = await manager(User).select(User, Role).join(Role).on(
+            User.role_id == Role.id).fetchall()
+        assert user2 is user
+        assert user2.role is role1
+
+        # Partial rows are not stored
+        [role3] = await manager(Role).select(Role.id).fetchall()
+        assert role3 is not role1
+
+        assert await manager(Role).get(42) is None
+
+        # Inserted models are stored only when all the fields are returned
+        user = await manager(User).insert(name='tom')
+        user2 = await manager(User).get(user.id)
+        assert user2 is not user
+        assert user2.is_active is True
+        assert len(await manager(User).select().fetchall()) == 2
+
+        role4 = await manager(Role).insert(name='admin').returning('*')
+        assert await manager(Role).get(role4.id) is role4
+
+    assert await manager(Role).get(role.id) is not role1
+
+
+async def test_cached(Role, User):
+    from pypika_orm import Manager
+
+    # The module's manager runs the tests inside transactions which bypass the cache
+    async with Manager('sqlite:///:memory:') as manager:
+        await manager(Role).create_table()
+        await manager(User).create_table()
+        results = manager.results
+        await manager(Role).insert(name='user')
+
+        qs = manager(Role).select().where(Role.name == 'user').cached(ttl=60)
+        [role] = await qs.fetchall()
+        assert len(results) == 1
+
+        # Served from the cache
+        await manager.execute('UPDATE role SET name = \'raw\'')
+        [role2] = await qs.fetchall()
+        assert role2.name == 'user'
+        assert role2 is not role
+
+        # Writes through the manager invalidate the results
+        await manager(User).insert(name='jim')
+        assert len(results) == 1
+        await manager(Role).update().set(Role.name, 'admin')
+        assert len(results) == 0
+        assert await qs.fetchall() == []
+
+        assert await manager(Role).select(Role.name).cached().fetchval() == 'admin'
+        assert len(results) == 2
+        await manager(Role).delete()
+        assert len(results) == 0
+
+        # Writes with extra arguments invalidate the results too
+        assert await manager(Role).select(Role.name).cached().fetchall() == []
+        await manager(Role).insert(name='user').run('execute', timeout=10)
+        assert len(results) == 0
+
+        # Results are not cached inside transactions
+        async with manager.transaction() as trans:
+            await manager(Role).insert(name='ghost')
+            assert await manager(Role).select(Role.name).cached().scalars().fetchall() == [
+                'user', 'ghost']
+            assert len(results) == 0
+            await trans.rollback()
+
+        assert await manager(Role).select(Role.name).cached().scalars().fetchall() == ['user']
+
+
+async def test_fetch_modes(manager, Role):
+    await manager(Role).insert_many([{'name': 'user'}, {'name': 'admin'}])
+    qs = manager(Role).select().orderby(Role.id)
+
+    assert await qs.values(Role.id, Role.name).fetchall() == [
+        {'id': 1, 'name': 'user'}, {'id': 2, 'name': 'admin'}]
+    assert await qs.tuples(Role.id, Role.name).fetchall() == [(1, 'user'), (2, 'admin')]
+    assert await qs.scalars(Role.name).fetchall() == ['user', 'admin']
+    assert await qs.scalars().fetchone() == 1
+
+    rows = await manager(Role).tuples().where(Role.id == 2).fetchall()
+    assert rows[0][:2] == (2, 'admin')
+
+    chunks = [chunk async for chunk in qs.scalars(Role.id).chunks(batch_size=1)]
+    assert chunks == [[1], [2]]
+
+
+async def test_fetch_columns(manager, User):
+    await manager(User).insert_many([
+        {'name': f"user{idx}", 'role_id': idx if idx % 3 else None} for idx in range(1, 6)])
+
+    columns = await manager(User).select(User.id, User.name, User.role_id).orderby(
+        User.id).fetch_columns(batch_size=2)
+    assert list(columns) == ['id', 'name', 'role_id']
+    assert list(columns['id']) == [1, 2, 3, 4, 5]
+    assert list(columns['name']) == ['user1', 'user2', 'user3', 'user4', 'user5']
+    assert list(columns['role_id']) == [1, 2, None, 4, 5]
+
+    # Foreign keys have the referenced field's type
+    columns = await manager(User).select(User.role_id).where(User.role_id.notnull()).orderby(
+        User.id).fetch_columns()
+    role_ids = columns['role_id']
+    assert list(role_ids) == [1, 2, 4, 5]
+    assert str(getattr(role_ids, 'dtype', getattr(role_ids, 'typecode', None))) in ('q', 'int64')
+
+    columns = await manager(User).select().where(User.id > 10).fetch_columns()
+    assert columns == {}
+
+
+async def test_converters(manager, User, Role):
+    import datetime as dt
+
+    role = await manager(Role).insert(name='user')
+    now = dt.datetime.utcnow()
+    await manager(Role).update().set(Role.created, now)
+    await manager(User).insert(name='jim', role_id=role.id, is_active=False, created=now)
+
+    [user] = await manager(User).select().fetchall()
+    assert user.created == now
+    assert user.is_active is False
+
+    [user] = await manager(User).select(User, Role).join(Role).on(
+        User.role_id == Role.id).fetchall()
+    assert isinstance(user.role.created, dt.datetime)
+
+    user = await manager(User).insert(name='tom').returning('*')
+    assert user.is_active is True
+
+    # Plain rows are not converted
+    assert await manager(User).select(User.is_active).scalars().fetchone() == 0
+
+
+async def test_converters_params(manager):
+    import uuid
+    from pypika_orm import Model, fields
+
+    class Item(Model):
+        id = fields.Auto()
+        uid = fields.UUIDB()
+
+    await manager(Item).create_table().if_not_exists()
+    uid = uuid.uuid4()
+
+    item = await manager(Item).insert(uid=uid)
+    assert item.uid == uid
+
+    item = await manager.save(Item(uid=uuid.uuid4()))
+    assert isinstance(item.uid, uuid.UUID)
+
+    [found] = await manager(Item).select().where(Item.uid == uid).fetchall()
+    assert found.uid == uid
+    assert await manager(Item).select().where(Item.uid.isin([uid, item.uid])).fetchall()
+    assert len(await manager(Item).select().where(Item.uid != uid).fetchall()) == 1
+
+
+async def test_gather(manager, Role):
+    await manager(Role).insert_many([{'name': 'user'}, {'name': 'admin'}])
+
+    [roles, count] = await manager.gather(
+        manager(Role).select().orderby(Role.id),
+        manager(Role).select(fn.Count(Role.id)).fetchval(),
+    )
+    assert [role.name for role in roles] == ['user', 'admin']
+    assert count == 2
+
+    names = await manager.map(
+        lambda pk: manager(Role).select(Role.name).where(Role.id == pk).fetchval(), [2, 1])
+    assert names == ['admin', 'user']
+
+
+async def test_pool_stats(manager, Role):
+    await manager(Role).select().fetchall()
+
+    stats = manager.pool_stats()
+    assert stats['acquired'] >= 1
+    assert stats['in_use'] >= 1
+    assert stats['timeouts'] == 0
+    assert stats['size'] is None
+    assert stats['wait_p50'] <= stats['wait_p99']
+
+
+async def test_run_concurrently(manager):
+    from pypika_orm import backends
+
+    async def get_connection():
+        return manager.db.connection
+
+    [conn1, conn2] = await backends.run_concurrently(
+        [manager.db], [get_connection(), get_connection()])
+    assert conn1 is not conn2
+    assert manager.db.connection not in (conn1, conn2)
+
+
+async def test_run_concurrently_replicas():
+    from pypika_orm import Manager, backends
+
+    async with Manager('sqlite:///:memory:', replicas=['sqlite:///:memory:']) as manager:
+        [replica] = manager.replicas
+
+        async def query(idx):
+            return await replica.fetchval('SELECT 1'), await manager.db.fetchval('SELECT 2')
+
+        results = await backends.run_concurrently(
+            (manager.db, replica), [query(idx) for idx in range(4)])
+        assert results == [(1, 2)] * 4
+
+        stats = manager.pool_stats()
+        assert stats['acquired'] == stats['replicas'][0]['acquired'] == 4
+        assert stats['in_use'] == stats['replicas'][0]['in_use'] == 0
+
+
+async def test_replicas_transaction(User):
+    from pypika_orm import Manager
+
+    async with Manager('sqlite:///:memory:', replicas=['sqlite:///:memory:']) as manager:
+        qs = manager(User).select()
+        assert qs.get_db() is manager.replicas[0]
+
+        async with manager.transaction():
+            assert qs.get_db() is manager.db
+
+        assert qs.get_db() is manager.replicas[0]
+
+
+async def test_instrumentation(manager, Role, caplog):
+    from pypika_orm import Manager
+    from pypika_orm.instrumentation import QueryStats
+
+    manager = Manager(manager.db, slow_query_threshold=0)
+    stats = QueryStats()
+    events = []
+    manager.instrument(before=lambda event: events.append(('before', event.sql)), after=stats)
+    manager.instrument(after=lambda event: events.append(('after', event)))
+
+    await manager(Role).insert_many([{'name': 'user'}, {'name': 'admin'}])
+    for pk in (1, 2):
+        await manager(Role).select().where(Role.id.isin([pk, 3, 4][:pk + 1])).fetchall()
+    assert await manager(Role).select().where(Role.id == 42).fetchone() is None
+
+    event = events[-3][1]
+    assert event.model is Role
+    assert event.method == 'fetchall'
+    assert event.params == (2, 3, 4)
+    assert event.rows == 1
+    assert event.db_time > 0
+    assert event.hydrate_time > 0
+    assert events[-1][1].rows == 0
+    assert [kind for kind, _ in events] == ['before', 'after'] * 4
+
+    report = stats.report()
+    assert [query['total'] for query in report] == sorted(
+        (query['total'] for query in report), reverse=True)
+
+    [select] = [query for query in report if query['sql'].endswith('IN (...)')]
+    assert select['sql'] == 'SELECT "id","name","created" FROM "role" WHERE "id" IN (...)'
+    assert select['count'] == 2
+    assert select['rows'] == 2
+    assert select['p50'] <= select['p95'] <= select['p99']
+    assert len(stats.report()) == 3
+
+    assert 'Slow query' in caplog.text
+
+    # Streamed queries
+    events.clear()
+    qs = manager(Role).select().orderby(Role.id)
+    assert len([role async for role in qs.iterate(batch_size=1)]) == 2
+    assert await qs.fetch_columns(batch_size=1)
+    async with aclosing(qs.chunks(batch_size=1)) as chunks:
+        async for _ in chunks:
+            break
+
+    [(_, chunks), (_, columns), (_, closed)] = [
+        event for event in events if event[0] == 'after']
+    assert [event.method for event in (chunks, columns, closed)] == [
+        'chunks', 'fetch_columns', 'chunks']
+    assert chunks.rows == columns.rows == 2
+    assert closed.rows == 1
+    assert chunks.db_time > 0
+    assert chunks.hydrate_time > 0
+    assert [kind for kind, _ in events] == ['before', 'after'] * 3